@@ -1,65 +1,309 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+import atexit
 import os
+from flask import Blueprint, Flask, current_app, request, jsonify
+from flask_cors import CORS
 from dotenv import load_dotenv
-from food_analyzer import FoodAnalyzer
-from health_assessor import HealthAssessor
-import base64
-from PIL import Image
-import io
+from werkzeug.exceptions import RequestEntityTooLarge
+from disease_rules import load_rule_file
+from load_shedder import TIER_NAMES, ServiceOverloaded
+from meal_log import parse_day, week_start
+from services import Services
+from uploads import UploadError, make_request_class, open_upload_image
+
+# Heavy dependencies (torch, torchvision, google-generativeai, numpy, PIL) are only
+# imported once a request needs them; see Services and benchmarks/bench_startup.py.
+# Gunicorn: `gunicorn "app:create_app()"` (or `app:app`, built on first access).
+
+api = Blueprint('api', __name__)
+
+def env_list(name, default, cast=float):
+    return tuple(cast(v) for v in os.getenv(name, default).split(',') if v.strip())
+
+def load_config():
+    """App settings read from the environment (and .env)"""
+    load_dotenv()
+    return {
+        # Upload limits: requests above MAX_UPLOAD_MB are rejected from the Content-Length header,
+        # file parts above UPLOAD_SPOOL_KB are spooled to the uploads folder instead of memory
+        'UPLOAD_FOLDER': 'uploads',
+        'MAX_CONTENT_LENGTH': int(float(os.getenv('MAX_UPLOAD_MB', 10)) * 1024 * 1024),
+        'UPLOAD_SPOOL_BYTES': int(os.getenv('UPLOAD_SPOOL_KB', 1024)) * 1024,
+        'UPLOAD_MAX_PIXELS': int(os.getenv('UPLOAD_MAX_PIXELS', 50_000_000)),
+        # For the local models JPEGs are decoded at a reduced scale that keeps at least this
+        # many pixels per side; Gemini gets the full-resolution image
+        'UPLOAD_DECODE_SIZE': int(os.getenv('UPLOAD_DECODE_SIZE', 1024)),
+
+        'GEMINI_API_KEY': os.getenv('GEMINI_API_KEY'),
+        'MODEL_CONFIDENCE_THRESHOLD': float(os.getenv('MODEL_CONFIDENCE_THRESHOLD', 0.7)),
+        'EMBEDDING_INDEX_SIZE': int(os.getenv('EMBEDDING_INDEX_SIZE', 10000)),
+        'EMBEDDING_INDEX_DIR': os.getenv('EMBEDDING_INDEX_DIR') or None,
+        'EMBEDDING_SIMILARITY_THRESHOLD': float(os.getenv('EMBEDDING_SIMILARITY_THRESHOLD', 0.92)),
+        'INFERENCE_SOCKET': os.getenv('INFERENCE_SOCKET') or None,
+        'INFERENCE_TIMEOUT': float(os.getenv('INFERENCE_TIMEOUT', 10)),
+        'PROFILE_CACHE_SIZE': int(os.getenv('PROFILE_CACHE_SIZE', 1024)),
+        'PROFILE_DB_PATH': os.getenv('PROFILE_DB_PATH') or None,
+        # Meals logged with logMeal=true; kept in memory unless a SQLite file is given
+        'MEAL_LOG_DB_PATH': os.getenv('MEAL_LOG_DB_PATH') or None,
+        # JSON file with extra conditions, shaped like disease_rules.DISEASE_RULES
+        'DISEASE_RULES_FILE': os.getenv('DISEASE_RULES_FILE') or None,
+
+        # Load shedding: in-flight /api/analyze requests and p95 latency at which the
+        # single-backbone, local-only and 503 tiers start (see load_shedder.py).
+        # WEB_THREADS is the gunicorn --threads value (the Dockerfile passes it through);
+        # without LOAD_SHED_QUEUE the in-flight thresholds are derived from it
+        'WEB_THREADS': int(os.getenv('WEB_THREADS', 8)),
+        'LOAD_SHEDDING': os.getenv('LOAD_SHEDDING', 'true').lower() in ('1', 'true', 'yes'),
+        'LOAD_SHED_QUEUE': env_list('LOAD_SHED_QUEUE', '', int) or None,
+        'LOAD_SHED_P95_MS': env_list('LOAD_SHED_P95_MS', '20000,40000,60000'),
+        'LOAD_SHED_RECOVERY': float(os.getenv('LOAD_SHED_RECOVERY', 0.5)),
+        'LOAD_SHED_DWELL_S': float(os.getenv('LOAD_SHED_DWELL_S', 10)),
+        'LOAD_SHED_WINDOW_S': float(os.getenv('LOAD_SHED_WINDOW_S', 60)),
+        'LOAD_SHED_RETRY_AFTER_S': int(os.getenv('LOAD_SHED_RETRY_AFTER_S', 5)),
+        # Backbone for the degraded tiers; empty means the embedding model (EMBEDDING_MODEL)
+        'FAST_MODEL': os.getenv('FAST_MODEL') or None,
+
+        # Build the analyzers and load the models at startup rather than on the first request
+        'WARM_UP': os.getenv('WARM_UP', 'false').lower() in ('1', 'true', 'yes'),
+    }
 
-load_dotenv()
+def create_app(config=None):
+    """
+    Application factory. Only Flask and the lightweight modules are imported
+    here; analyzers are created on first use unless WARM_UP is set.
+    config: optional overrides for the values from load_config()
+    """
+    app = Flask(__name__)
+    app.config.update(load_config())
+    app.config.update(config or {})
+    app.request_class = make_request_class(app.config['UPLOAD_SPOOL_BYTES'], app.config['UPLOAD_FOLDER'])
+    CORS(app)
+    app.register_blueprint(api)
 
-app = Flask(__name__)
-CORS(app)
+    app.extensions['services'] = Services(app.config)
+    on_startup(app)
+    atexit.register(on_shutdown, app)
+    return app
 
-# Initialize analyzers
-food_analyzer = FoodAnalyzer(os.getenv('GEMINI_API_KEY'))
-health_assessor = HealthAssessor()
+def on_startup(app):
+    """Lifecycle hook run once by create_app"""
+    # Create uploads directory (spool location for large uploads)
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    # Read after load_dotenv so a path set only in .env is honoured
+    if app.config['DISEASE_RULES_FILE']:
+        load_rule_file(app.config['DISEASE_RULES_FILE'])
+    if app.config['WARM_UP']:
+        app.extensions['services'].warm_up()
 
-# Create uploads directory
-UPLOAD_FOLDER = 'uploads'
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
+def on_shutdown(app):
+    """Lifecycle hook run at interpreter exit"""
+    app.extensions['services'].shutdown()
 
-@app.route('/api/health', methods=['GET'])
+def services():
+    return current_app.extensions['services']
+
+_app = None
+
+def __getattr__(name):
+    # `app:app` keeps working for gunicorn and `flask run` without building the app on import
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@api.app_errorhandler(413)
+def upload_too_large(e):
+    max_mb = current_app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    return jsonify({'error': f'Upload too large - maximum is {max_mb}MB'}), 413
+
+@api.app_errorhandler(ServiceOverloaded)
+def overloaded(e):
+    retry_after = e.retry_after or services().load_shedder.retry_after_s
+    response = jsonify({'error': str(e), 'serviceTier': TIER_NAMES[e.tier], 'retryAfter': retry_after})
+    response.headers['Retry-After'] = str(retry_after)
+    response.headers['X-Service-Tier'] = TIER_NAMES[e.tier]
+    return response, 503
+
+@api.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'healthy', 'message': 'Food Analysis API is running'}), 200
+    return jsonify({'status': 'healthy', 'message': 'Food Analysis API is running',
+                    'loaded': services().loaded()}), 200
+
+def parse_profile_fields(data):
+    """Read height, weight and diseases from form or JSON data; raises ValueError on bad input"""
+    try:
+        height = float(data.get('height', 0) or 0)
+        weight = float(data.get('weight', 0) or 0)
+    except TypeError:
+        raise ValueError('height and weight must be numbers')
+    diseases = data.get('diseases', '') or []
+    if isinstance(diseases, str):
+        diseases = diseases.split(',')
+    if not isinstance(diseases, list) or not all(isinstance(d, str) for d in diseases):
+        raise ValueError('diseases must be a comma-separated string or a list of strings')
+    diseases = [d.strip() for d in diseases if d.strip()]
+    return height, weight, diseases
 
-@app.route('/api/analyze', methods=['POST'])
+@api.route('/api/profile', methods=['POST'])
+def register_profile():
+    """Create a health profile, or update it when profileId is given"""
+    try:
+        data = request.get_json(silent=True) or request.form
+        height, weight, diseases = parse_profile_fields(data)
+        if height <= 0 or weight <= 0:
+            return jsonify({'error': 'Height and weight are required'}), 400
+        
+        profile = services().profile_store.register(height, weight, diseases, profile_id=data.get('profileId'))
+        return jsonify({'profile': profile.to_dict(), 'success': True}), 200
+        
+    except KeyError:
+        return jsonify({'error': 'Profile not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': f'Invalid profile data: {e}'}), 400
+
+@api.route('/api/profile/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    profile, error = find_profile_or_404(profile_id)
+    if error:
+        return error
+    return jsonify({'profile': profile.to_dict(), 'success': True}), 200
+
+def find_profile_or_404(profile_id):
+    profile = services().profile_store.get(profile_id)
+    if profile is None:
+        return None, (jsonify({'error': 'Profile not found'}), 404)
+    return profile, None
+
+def daily_summary(profile, day, totals=None):
+    if totals is None:
+        totals = services().meal_log.day_totals(profile.profile_id, day)
+    summary = {'date': day.isoformat(), **totals.to_dict()}
+    summary.update(services().health_assessor.assess_day(profile, totals))
+    return summary
+
+@api.route('/api/meals/<profile_id>/daily', methods=['GET'])
+def get_daily_summary(profile_id):
+    """Totals and day-level warnings for one day of logged meals (?date=YYYY-MM-DD, default today UTC)"""
+    profile, error = find_profile_or_404(profile_id)
+    if error:
+        return error
+    try:
+        day = parse_day(request.args.get('date'))
+    except ValueError:
+        return jsonify({'error': 'Invalid date - use YYYY-MM-DD'}), 400
+    return jsonify({'summary': daily_summary(profile, day), 'success': True}), 200
+
+@api.route('/api/meals/<profile_id>/weekly', methods=['GET'])
+def get_weekly_summary(profile_id):
+    """Totals and average-day warnings for the Monday-Sunday week containing ?date="""
+    profile, error = find_profile_or_404(profile_id)
+    if error:
+        return error
+    try:
+        day = parse_day(request.args.get('date'))
+    except ValueError:
+        return jsonify({'error': 'Invalid date - use YYYY-MM-DD'}), 400
+    
+    totals = services().meal_log.week_totals(profile.profile_id, day)
+    average_day = totals.per_day()
+    summary = {
+        'weekStart': week_start(day).isoformat(),
+        'daysLogged': totals.days,
+        **totals.to_dict(),
+        'averagePerDay': average_day.to_dict(),
+        'averageDayAssessment': services().health_assessor.assess_day(profile, average_day)
+    }
+    return jsonify({'summary': summary, 'success': True}), 200
+
+@api.route('/api/metrics', methods=['GET'])
+def metrics():
+    loaded = services().loaded()
+    metrics = {'loaded': loaded, 'loadShedding': services().load_shedder.stats()}
+    # Metrics never trigger loading the analyzer
+    if 'foodAnalyzer' not in loaded:
+        return jsonify(metrics), 200
+    food_analyzer = services().food_analyzer
+    metrics['geminiJson'] = food_analyzer.json_stats()
+    local_predictor = food_analyzer.local_predictor
+    if hasattr(local_predictor, 'resources'):
+        metrics['inference'] = local_predictor.resources.describe()
+    elif local_predictor is not None:
+        metrics['inferenceClient'] = local_predictor.stats()
+    if food_analyzer.embedding_index:
+        metrics['embeddingIndex'] = food_analyzer.embedding_index.stats()
+    return jsonify(metrics), 200
+
+@api.route('/api/analyze', methods=['POST'])
 def analyze_food():
+    # Shed or degrade before touching the upload; the tier is reported with every answer
+    with services().load_shedder.admit() as tier:
+        response, status = run_analysis(tier)
+    response.headers['X-Service-Tier'] = TIER_NAMES[tier]
+    return response, status
+
+def run_analysis(tier):
     try:
         # Get form data
         if 'image' not in request.files:
             return jsonify({'error': 'No image provided'}), 400
         
         image_file = request.files['image']
-        height = float(request.form.get('height', 0))
-        weight = float(request.form.get('weight', 0))
-        diseases = request.form.get('diseases', '').split(',')
-        diseases = [d.strip() for d in diseases if d.strip()]
+        
+        # A registered profile skips parsing and recomputing the user's metrics
+        profile = None
+        profile_id = request.form.get('profileId')
+        if profile_id:
+            profile = services().profile_store.get(profile_id)
+            if profile is None:
+                return jsonify({'error': 'Profile not found'}), 404
+            height, weight, diseases = profile.height, profile.weight, profile.diseases
+        else:
+            try:
+                height, weight, diseases = parse_profile_fields(request.form)
+            except ValueError as e:
+                return jsonify({'error': f'Invalid profile data: {e}'}), 400
+        
+        # Optionally append the meal to the profile's log
+        log_meal = request.form.get('logMeal', '').lower() in ('1', 'true', 'yes')
+        if log_meal:
+            if profile is None:
+                return jsonify({'error': 'logMeal requires a profileId'}), 400
+            try:
+                meal_day = parse_day(request.form.get('mealDate'))
+            except ValueError:
+                return jsonify({'error': 'Invalid mealDate - use YYYY-MM-DD'}), 400
         
         if not image_file or image_file.filename == '':
             return jsonify({'error': 'Invalid image'}), 400
         
-        # Read and process image
-        image_bytes = image_file.read()
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Analyze food with Gemini
-        print("Analyzing food image...")
-        food_analysis = food_analyzer.analyze_food_image(image)
+        # Validate from the header, then decode straight from the spooled upload. The local
+        # models get a reduced JPEG decode; Gemini gets the full image, decoded only if called.
+        max_pixels = current_app.config['UPLOAD_MAX_PIXELS']
+        try:
+            image = open_upload_image(image_file, max_pixels, draft_size=current_app.config['UPLOAD_DECODE_SIZE'])
+            
+            # Analyze food with Gemini
+            print("Analyzing food image...")
+            food_analysis = services().food_analyzer.analyze_food_image(
+                image, tier=tier, full_image=lambda: open_upload_image(image_file, max_pixels)
+            )
+        except UploadError as e:
+            return jsonify({'error': str(e)}), e.status_code
+        finally:
+            image_file.close()
         
         if 'error' in food_analysis:
             return jsonify({'error': food_analysis['error']}), 500
         
         # Perform health assessment
         print("Performing health assessment...")
-        health_assessment = health_assessor.assess_health(
+        health_assessment = services().health_assessor.assess_health(
             height=height,
             weight=weight,
             diseases=diseases,
-            food_data=food_analysis
+            food_data=food_analysis,
+            profile=profile
         )
         
         if 'error' in health_assessment:
@@ -69,11 +313,20 @@ def analyze_food():
         result = {
             'foodAnalysis': food_analysis,
             'healthAssessment': health_assessment,
+            'serviceTier': TIER_NAMES[tier],
             'success': True
         }
         
+        if log_meal:
+            meal_id, totals = services().meal_log.log(
+                profile.profile_id, food_analysis, health_assessment['caloriePercentage'], meal_day
+            )
+            result['mealLog'] = {'mealId': meal_id, 'dailySummary': daily_summary(profile, meal_day, totals)}
+        
         return jsonify(result), 200
         
+    except (RequestEntityTooLarge, ServiceOverloaded):
+        raise
     except Exception as e:
         print(f"Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -83,4 +336,4 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     # Bind to 0.0.0.0 for Docker compatibility
     debug_mode = os.environ.get('FLASK_ENV', 'development') == 'development'
-    app.run(host='0.0.0.0', debug=debug_mode, port=port)
+    create_app().run(host='0.0.0.0', debug=debug_mode, port=port)
@@ -0,0 +1,58 @@
+"""
+Auto-tune the split between PyTorch intra-op threads and concurrent forward
+passes on this machine, and compare it with the oversubscribed default where
+every request thread runs forwards with all cores.
+
+Uses the same backbones as LocalModelPredictor with random weights, so no
+checkpoint files are needed.
+
+Usage: python benchmarks/bench_cpu_split.py [--model efficientnet] [--requests 24] [--client-threads N]
+"""
+import argparse
+import os
+import sys
+
+import torch
+import torchvision.models as models
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from resource_manager import autotune, available_cores  # noqa: E402
+
+BACKBONES = {
+    'convnext': models.convnext_base,
+    'efficientnet': models.efficientnet_v2_m,
+    'vit': models.vit_b_16,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', choices=sorted(BACKBONES), default='efficientnet')
+    parser.add_argument('--requests', type=int, default=24)
+    parser.add_argument('--client-threads', type=int, default=None,
+                        help='concurrent request threads to simulate (default: max(2, cores))')
+    args = parser.parse_args()
+
+    model = BACKBONES[args.model](weights=None).eval()
+    inputs = torch.randn(1, 3, 224, 224)
+
+    def workload():
+        with torch.no_grad():
+            model(inputs)
+
+    print(f"{args.model} on {available_cores()} cores, {args.requests} requests")
+    results = autotune(workload, requests=args.requests, client_threads=args.client_threads)
+
+    print(f"{'mode':<16}{'intra':>6}{'conc':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}")
+    for r in results:
+        print(f"{r['mode']:<16}{r['intraOpThreads']:>6}{r['maxConcurrent']:>6}"
+              f"{r['throughput']:>9.2f}{r['p50Ms']:>10.1f}{r['p95Ms']:>10.1f}")
+
+    best = next(r for r in results if r['mode'] == 'split')
+    print("\nSuggested settings:")
+    print(f"TORCH_INTRA_OP_THREADS={best['intraOpThreads']}")
+    print(f"INFERENCE_CONCURRENCY={best['maxConcurrent']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Preprocessing cost per image at typical phone resolutions, before and after the
+shared preprocessing path.
+
+before: full JPEG decode, then the torchvision Resize -> ToTensor -> Normalize
+        chain run once per backbone (three times)
+after:  reduced-scale JPEG decode, one RGB conversion and one fast resize into a
+        pooled, in-place normalized tensor shared by the backbones
+
+Usage: python benchmarks/bench_preprocessing.py [--repeat N]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+import torchvision.transforms as transforms
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing import ImagePreprocessor  # noqa: E402
+
+RESOLUTIONS = {
+    '1080p (2MP)': (1920, 1080),
+    '8MP': (3264, 2448),
+    '12MP': (4032, 3024),
+    '48MP': (8000, 6000),
+}
+BACKBONES = 3
+INPUT_SIZE = 224
+DECODE_SIZE = 1024
+
+
+def make_jpeg(width, height):
+    # Smooth gradient plus noise compresses like a photo rather than pure noise
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)], axis=-1)
+    noise = np.random.randint(0, 32, size=base.shape)
+    buffer = io.BytesIO()
+    Image.fromarray((base + noise).clip(0, 255).astype(np.uint8)).save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def before(jpeg, transform):
+    image = Image.open(io.BytesIO(jpeg))
+    image.load()
+    return [transform(image.convert('RGB')).unsqueeze(0) for _ in range(BACKBONES)]
+
+
+def after(jpeg, preprocessor):
+    image = Image.open(io.BytesIO(jpeg))
+    image.draft('RGB', (DECODE_SIZE, DECODE_SIZE))
+    image.load()
+    with preprocessor.tensors(image, [INPUT_SIZE] * BACKBONES) as tensors:
+        return tensors[INPUT_SIZE].sum().item()
+
+
+def timed(fn, repeat):
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    torch.set_num_threads(1)
+    transform = transforms.Compose([
+        transforms.Resize((INPUT_SIZE, INPUT_SIZE)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
+    ])
+    preprocessor = ImagePreprocessor()
+
+    print(f"{'resolution':<14}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    for name, (width, height) in RESOLUTIONS.items():
+        jpeg = make_jpeg(width, height)
+        before_ms = timed(lambda: before(jpeg, transform), args.repeat)
+        after_ms = timed(lambda: after(jpeg, preprocessor), args.repeat)
+        print(f"{name:<14}{before_ms:>14.1f}{after_ms:>14.1f}{before_ms / after_ms:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Import-time budget for the web process.
+
+Runs `python -X importtime -c "import app; app.create_app()"` in a fresh
+interpreter a few times, reports the cumulative import time of `app` and the
+heaviest modules it pulled in, and fails when the best run exceeds the budget
+or when a heavy dependency is imported eagerly. Run it in CI to catch
+regressions in cold start (process start, test collection, scale-out).
+
+Usage: python benchmarks/bench_startup.py [--budget-ms 500] [--runs 3] [--top 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must only be imported once a request needs them
+DEFERRED_MODULES = ('torch', 'torchvision', 'timm', 'google.generativeai', 'numpy', 'PIL.Image')
+
+STARTUP_CODE = (
+    "import sys, app; app.create_app(); "
+    f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+)
+
+
+def measure():
+    """Return ({module: (self us, cumulative us)}, eagerly imported deferred modules) for one cold start"""
+    env = dict(os.environ, WARM_UP='false')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+                            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        # Keep the first (outermost) entry for a module
+        timings.setdefault(name, (int(self_us), int(cumulative_us)))
+    loaded = [m for m in result.stdout.strip().split(',') if m]
+    return timings, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('STARTUP_BUDGET_MS', 500)))
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    timings, loaded = min(runs, key=lambda run: run[0]['app'][1])
+    total_ms = timings['app'][1] / 1000.0
+
+    print(f"{'module':<40}{'self ms':>10}{'cumul. ms':>12}")
+    heaviest = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us) in heaviest:
+        print(f"{name:<40}{self_us / 1000:>10.1f}{cumulative_us / 1000:>12.1f}")
+
+    print(f"\nimport app (best of {args.runs}): {total_ms:.1f} ms, budget {args.budget_ms:.0f} ms")
+    failed = False
+    if total_ms > args.budget_ms:
+        print("FAIL: import time over budget")
+        failed = True
+    if loaded:
+        print(f"FAIL: imported at startup: {', '.join(loaded)}")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+import json
+from functools import lru_cache
+
+# Declarative disease rules. Each condition lists the names users type for it and
+# the checks applied to a food:
+#   - threshold rules fire on the first tier where any listed nutrient is above its
+#     limit (nutrient names are NutritionRecord fields, messages are format strings
+#     over the same fields)
+#   - junk rules fire for processed/junk food; they only penalize when no junk
+#     penalty has been applied yet, and optionally still warn when one has
+# Optional `daily_rules` are threshold rules applied to a day's logged totals.
+# New conditions can be added here or through a JSON file named by DISEASE_RULES_FILE
+# (merged by load_rule_file when the app starts).
+DISEASE_RULES = {
+    'diabetes': {
+        'aliases': ['diabetic', 'type 1 diabetes', 'type 2 diabetes'],
+        'restrictions': ['high sugar', 'refined carbs', 'sweet'],
+        'rules': [
+            {'tiers': [
+                {'above': {'sugar': 20}, 'penalty': 2.5,
+                 'message': "❌ High sugar content ({sugar:g}g) - Dangerous for diabetes"},
+                {'above': {'sugar': 15}, 'penalty': 1,
+                 'message': "⚠️ Moderate sugar content ({sugar:g}g) - Monitor intake"},
+            ]},
+            {'junk': True, 'penalty': 1.5,
+             'message': "❌ Processed foods can spike blood sugar levels"},
+        ],
+        'daily_rules': [
+            {'tiers': [
+                {'above': {'sugar': 50}, 'penalty': 0,
+                 'message': "❌ {sugar:g}g of sugar for the day - Far above a safe daily amount for diabetes"},
+                {'above': {'sugar': 25}, 'penalty': 0,
+                 'message': "⚠️ {sugar:g}g of sugar for the day - Keep the rest of the day low in sugar"},
+            ]},
+        ],
+    },
+    'hypertension': {
+        'aliases': ['high blood pressure', 'blood pressure'],
+        'restrictions': ['high sodium', 'salt', 'salty'],
+        'rules': [
+            {'tiers': [
+                {'above': {'sodium': 800}, 'penalty': 2.5,
+                 'message': "❌ Very high sodium ({sodium:g}mg) - Dangerous for hypertension"},
+                {'above': {'sodium': 500}, 'penalty': 1.5,
+                 'message': "⚠️ High sodium ({sodium:g}mg) - Monitor intake"},
+            ]},
+        ],
+        'daily_rules': [
+            {'tiers': [
+                {'above': {'sodium': 2300}, 'penalty': 0,
+                 'message': "❌ {sodium:g}mg of sodium for the day - Above the daily limit for hypertension"},
+                {'above': {'sodium': 1500}, 'penalty': 0,
+                 'message': "⚠️ {sodium:g}mg of sodium for the day - Above the 1500mg recommended for hypertension"},
+            ]},
+        ],
+    },
+    'heart disease': {
+        'aliases': ['heart', 'heart condition', 'cardiac', 'cardiovascular disease'],
+        'restrictions': ['high fat', 'saturated fat', 'cholesterol'],
+        'rules': [
+            {'tiers': [
+                {'above': {'fats': 25, 'saturated_fat': 12}, 'penalty': 2.5,
+                 'message': "❌ High fat content - Not suitable for heart conditions"},
+                {'above': {'fats': 20, 'saturated_fat': 10}, 'penalty': 1,
+                 'message': "⚠️ Moderate fat content - Monitor intake"},
+            ]},
+            {'junk': True, 'penalty': 1.5,
+             'message': "❌ Processed foods increase cardiovascular risk"},
+        ],
+        'daily_rules': [
+            {'tiers': [
+                {'above': {'saturated_fat': 20}, 'penalty': 0,
+                 'message': "❌ {saturated_fat:g}g of saturated fat for the day - Too much for heart conditions"},
+                {'above': {'saturated_fat': 13}, 'penalty': 0,
+                 'message': "⚠️ {saturated_fat:g}g of saturated fat for the day - Above the recommended daily amount"},
+            ]},
+        ],
+    },
+    'obesity': {
+        'aliases': ['obese'],
+        'restrictions': ['high calorie', 'fried', 'fatty'],
+        'rules': [
+            {'junk': True, 'penalty': 2.5, 'warn_if_penalized': True,
+             'message': "❌ STRONGLY NOT RECOMMENDED - Junk food will worsen obesity"},
+            {'tiers': [
+                {'above': {'calories': 600}, 'penalty': 1.5,
+                 'message': "❌ High calorie meal ({calories:g} cal) - Choose lower calorie options"},
+            ]},
+        ],
+    },
+    'kidney disease': {
+        'aliases': [],
+        'restrictions': ['high sodium', 'high protein', 'potassium'],
+        'rules': [],
+        'daily_rules': [
+            {'tiers': [
+                {'above': {'sodium': 2000}, 'penalty': 0,
+                 'message': "⚠️ {sodium:g}mg of sodium for the day - Kidney diets usually stay under 2000mg"},
+            ]},
+            {'tiers': [
+                {'above': {'protein': 80}, 'penalty': 0,
+                 'message': "⚠️ {protein:g}g of protein for the day - High for kidney disease"},
+            ]},
+        ],
+    },
+    'celiac disease': {
+        'aliases': ['celiac', 'coeliac disease'],
+        'restrictions': ['gluten', 'wheat', 'barley', 'rye'],
+        'rules': [],
+    },
+    'lactose intolerance': {
+        'aliases': ['lactose intolerant'],
+        'restrictions': ['milk', 'dairy', 'lactose', 'cheese'],
+        'rules': [],
+    },
+}
+
+# Checks applied to everyone, skipped when an earlier warning already covers the topic
+GENERAL_RULES = [
+    {'unless_warned': 'sodium', 'tiers': [
+        {'above': {'sodium': 1000}, 'penalty': 1.5,
+         'message': "⚠️ Extremely high sodium ({sodium:g}mg) - Daily limit is 2300mg"},
+    ]},
+    {'unless_warned': 'sugar', 'tiers': [
+        {'above': {'sugar': 30}, 'penalty': 1.5,
+         'message': "⚠️ Very high sugar content ({sugar:g}g) - Limit sugar intake"},
+    ]},
+    {'unless_warned': 'fat', 'tiers': [
+        {'above': {'fats': 35}, 'penalty': 0.5,
+         'message': "⚠️ High fat content ({fats:g}g)"},
+    ]},
+]
+
+# Day-level checks applied to everyone's logged totals
+GENERAL_DAILY_RULES = [
+    {'unless_warned': 'sodium', 'tiers': [
+        {'above': {'sodium': 2300}, 'penalty': 0,
+         'message': "⚠️ {sodium:g}mg of sodium for the day - Daily limit is 2300mg"},
+    ]},
+    {'unless_warned': 'sugar', 'tiers': [
+        {'above': {'sugar': 50}, 'penalty': 0,
+         'message': "⚠️ {sugar:g}g of sugar for the day - Daily limit is 50g"},
+    ]},
+    {'unless_warned': 'fat', 'tiers': [
+        {'above': {'saturated_fat': 22}, 'penalty': 0,
+         'message': "⚠️ {saturated_fat:g}g of saturated fat for the day - Daily limit is about 22g"},
+    ]},
+]
+
+# Topics tracked so general rules don't repeat a warning
+WARNING_TOPICS = ('sodium', 'sugar', 'fat')
+
+
+@lru_cache(maxsize=1024)
+def warning_topics(message):
+    """Topics mentioned by a warning message"""
+    lowered = message.lower()
+    return frozenset(topic for topic in WARNING_TOPICS if topic in lowered)
+
+
+def normalize_condition(name):
+    """Normalize a user-entered condition name for lookup"""
+    return ' '.join(name.lower().split())
+
+
+class CompiledRule:
+    """One rule with thresholds and messages resolved for fast evaluation"""
+
+    __slots__ = ('tiers', 'junk', 'penalty', 'message', 'topics',
+                 'warn_if_penalized', 'unless_warned')
+
+    def __init__(self, spec):
+        # Each tier: (((field, limit), ...), penalty, message, needs_format, topics)
+        self.tiers = tuple(
+            (
+                tuple(tier['above'].items()),
+                tier['penalty'],
+                tier['message'],
+                '{' in tier['message'],
+                warning_topics(tier['message']),
+            )
+            for tier in spec.get('tiers', ())
+        )
+        self.junk = spec.get('junk', False)
+        self.penalty = spec.get('penalty', 0)
+        self.message = spec.get('message', '')
+        self.topics = warning_topics(self.message)
+        self.warn_if_penalized = spec.get('warn_if_penalized', False)
+        self.unless_warned = spec.get('unless_warned')
+
+
+class RuleSet:
+    """Compiled rules for one set of health conditions"""
+
+    __slots__ = ('conditions', 'rules')
+
+    def __init__(self, conditions, rules):
+        self.conditions = conditions
+        self.rules = rules
+
+    def evaluate(self, nutrition, is_unhealthy, penalty_applied, warnings):
+        """
+        Apply the rules to a food. New warnings are appended to `warnings`.
+        Returns the total penalty to subtract from the suitability score.
+        """
+        penalty = 0
+        covered = set()
+        for warning in warnings:
+            covered |= warning_topics(warning)
+
+        for rule in self.rules:
+            if rule.junk:
+                if not is_unhealthy:
+                    continue
+                if not penalty_applied:
+                    penalty += rule.penalty
+                elif not rule.warn_if_penalized:
+                    continue
+                warnings.append(rule.message)
+                covered |= rule.topics
+                continue
+
+            if rule.unless_warned and rule.unless_warned in covered:
+                continue
+
+            for checks, tier_penalty, message, needs_format, topics in rule.tiers:
+                if any(getattr(nutrition, field) > limit for field, limit in checks):
+                    penalty += tier_penalty
+                    warnings.append(message.format(**nutrition.as_dict()) if needs_format else message)
+                    covered |= topics
+                    break
+
+        return penalty
+
+
+@lru_cache(maxsize=None)
+def _alias_table():
+    aliases = {}
+    for condition, spec in DISEASE_RULES.items():
+        aliases[normalize_condition(condition)] = condition
+        for alias in spec.get('aliases', ()):
+            aliases[normalize_condition(alias)] = condition
+    return aliases
+
+
+@lru_cache(maxsize=1024)
+def profile_key(diseases):
+    """Normalized, order-independent key for a tuple of user-entered conditions"""
+    aliases = _alias_table()
+    known = {aliases.get(normalize_condition(d)) for d in diseases}
+    known.discard(None)
+    # Keep table order so warnings come out in a stable order
+    return tuple(condition for condition in DISEASE_RULES if condition in known)
+
+
+@lru_cache(maxsize=256)
+def compile_rules(key):
+    """Compile the rule set for a normalized profile key"""
+    rules = []
+    for condition in key:
+        rules.extend(CompiledRule(spec) for spec in DISEASE_RULES[condition]['rules'])
+    rules.extend(CompiledRule(spec) for spec in GENERAL_RULES)
+    return RuleSet(key, tuple(rules))
+
+
+def rules_for(diseases):
+    """Return the memoized RuleSet for a list of user-entered conditions"""
+    return compile_rules(profile_key(tuple(diseases or ())))
+
+
+@lru_cache(maxsize=256)
+def compile_daily_rules(key):
+    """Compile the day-level rule set for a normalized profile key"""
+    rules = []
+    for condition in key:
+        rules.extend(CompiledRule(spec) for spec in DISEASE_RULES[condition].get('daily_rules', ()))
+    rules.extend(CompiledRule(spec) for spec in GENERAL_DAILY_RULES)
+    return RuleSet(key, tuple(rules))
+
+
+def daily_rules_for(diseases):
+    """Return the memoized day-level RuleSet for a list of user-entered conditions"""
+    return compile_daily_rules(profile_key(tuple(diseases or ())))
+
+
+def load_rule_file(path):
+    """Merge extra conditions from a JSON file shaped like DISEASE_RULES"""
+    with open(path, encoding='utf-8') as f:
+        DISEASE_RULES.update(json.load(f))
+    _alias_table.cache_clear()
+    profile_key.cache_clear()
+    compile_rules.cache_clear()
+    compile_daily_rules.cache_clear()
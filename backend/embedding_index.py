@@ -0,0 +1,187 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: a shared index directory is then only safe for one process
+    fcntl = None
+
+# Bumped when the on-disk layout changes, so older index directories start over
+FORMAT_VERSION = 2
+
+
+class EmbeddingIndex:
+    """
+    Bounded nearest-neighbour index over image embeddings, each paired with a
+    stored foodAnalysis.
+
+    Embeddings are L2-normalized rows of a float32 matrix, so cosine similarity
+    is a single matrix-vector product. With `path` the matrix and the compact
+    slot tables (entry id, last hit time) are memory-mapped files and analyses
+    live in SQLite, so the index survives restarts and grows incrementally.
+    When full, the least recently hit entry is evicted.
+
+    Several worker processes can share one `path`: the entry count and next
+    entry id live in a memory-mapped header next to the tables, and inserts
+    take an exclusive lock on the directory's lock file, so each slot and id is
+    handed out once. Memory-mapped tables are flushed every `flush_every`
+    inserts and on flush().
+    """
+
+    def __init__(self, dim, capacity=10000, threshold=0.92, path=None, flush_every=64):
+        self.dim = dim
+        self.capacity = capacity
+        self.threshold = threshold
+        self.path = path
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._analyses = {}
+        self._db = None
+        self._lock_file = None
+        self._unflushed = 0
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._lock_file = open(os.path.join(path, 'index.lock'), 'a+b')
+            with self._file_lock():
+                self._open_files()
+        else:
+            self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+            self._ids = np.full(capacity, -1, dtype=np.int64)
+            self._used = np.zeros(capacity, dtype=np.float64)
+            self._header = np.zeros(2, dtype=np.int64)  # entry count, next entry id
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive across processes sharing `path`; callers hold self._lock for threads"""
+        if self._lock_file is None or fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _open_files(self):
+        meta_path = os.path.join(self.path, 'meta.json')
+        meta = {'dim': self.dim, 'capacity': self.capacity, 'version': FORMAT_VERSION}
+        fresh = True
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as f:
+                fresh = json.load(f) != meta  # different backbone, size or layout: start over
+        mode = 'w+' if fresh else 'r+'
+
+        self._vectors = np.memmap(os.path.join(self.path, 'embeddings.f32'), dtype=np.float32,
+                                  mode=mode, shape=(self.capacity, self.dim))
+        self._ids = np.memmap(os.path.join(self.path, 'ids.i64'), dtype=np.int64,
+                              mode=mode, shape=(self.capacity,))
+        self._used = np.memmap(os.path.join(self.path, 'used.f64'), dtype=np.float64,
+                               mode=mode, shape=(self.capacity,))
+        self._header = np.memmap(os.path.join(self.path, 'header.i64'), dtype=np.int64,
+                                 mode=mode, shape=(2,))
+
+        self._db = sqlite3.connect(os.path.join(self.path, 'analyses.db'), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS analyses (entry_id INTEGER PRIMARY KEY, analysis TEXT NOT NULL)")
+        if fresh:
+            self._ids[:] = -1
+            self._used[:] = 0
+            self._header[:] = 0
+            self._db.execute("DELETE FROM analyses")
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        self._db.commit()
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def search(self, embedding):
+        """Return (analysis, similarity) for the closest entry above the threshold, else (None, best)"""
+        query = self._normalize(embedding)
+        with self._lock:
+            count = int(self._header[0])
+            if not count:
+                return None, 0.0
+            # Slots fill from 0 upwards and are only reused by eviction, so the first
+            # `count` rows are exactly the live entries
+            similarities = self._vectors[:count] @ query
+            slot = int(np.argmax(similarities))
+            similarity = float(similarities[slot])
+            if similarity < self.threshold:
+                return None, similarity
+
+            self._used[slot] = time.time()
+            analysis = self._load_analysis(int(self._ids[slot]))
+            return analysis, similarity
+
+    def insert(self, embedding, analysis):
+        """Add an embedding and its analysis, evicting the least recently hit entry when full"""
+        vector = self._normalize(embedding)
+        serialized = json.dumps(analysis)
+        with self._lock, self._file_lock():
+            count = int(self._header[0])
+            if count < self.capacity:
+                slot = count
+                self._header[0] = count + 1
+            else:
+                slot = int(np.argmin(self._used))
+                self._drop_analysis(int(self._ids[slot]))
+
+            entry_id = int(self._header[1])
+            self._header[1] = entry_id + 1
+            self._vectors[slot] = vector
+            self._ids[slot] = entry_id
+            self._used[slot] = time.time()
+            self._store_analysis(entry_id, serialized)
+
+            self._unflushed += 1
+            if self._unflushed >= self.flush_every:
+                self._flush_tables()
+
+    def __len__(self):
+        return int(self._header[0])
+
+    def stats(self):
+        return {'entries': len(self), 'capacity': self.capacity, 'dim': self.dim,
+                'threshold': self.threshold, 'persistent': bool(self.path)}
+
+    def flush(self):
+        """Write memory-mapped tables to disk"""
+        with self._lock:
+            self._flush_tables()
+
+    def _flush_tables(self):
+        for table in (self._vectors, self._ids, self._used, self._header):
+            if isinstance(table, np.memmap):
+                table.flush()
+        self._unflushed = 0
+
+    def _store_analysis(self, entry_id, serialized):
+        if self._db is None:
+            self._analyses[entry_id] = serialized
+            return
+        self._db.execute("INSERT OR REPLACE INTO analyses VALUES (?, ?)", (entry_id, serialized))
+        self._db.commit()
+
+    def _load_analysis(self, entry_id):
+        if self._db is None:
+            serialized = self._analyses.get(entry_id)
+        else:
+            row = self._db.execute("SELECT analysis FROM analyses WHERE entry_id = ?", (entry_id,)).fetchone()
+            serialized = row[0] if row else None
+        return json.loads(serialized) if serialized else None
+
+    def _drop_analysis(self, entry_id):
+        if self._db is None:
+            self._analyses.pop(entry_id, None)
+        else:
+            self._db.execute("DELETE FROM analyses WHERE entry_id = ?", (entry_id,))
+            self._db.commit()
@@ -1,22 +1,53 @@
-import google.generativeai as genai
-from PIL import Image
 import json
-import re
-from model_predictor import LocalModelPredictor
+import threading
+from collections import OrderedDict
+from nutrition import FoodAnalysis
+from nutrition_table import table_analysis
+from load_shedder import TIER_FULL, TIER_LOCAL_ONLY, ServiceOverloaded
+from gemini_json import (
+    ANALYSIS_SCHEMA, RECOMMENDATIONS_SCHEMA, GeminiJSONParser, JSONRepairError, json_generation_config
+)
 
 class FoodAnalyzer:
-    def __init__(self, api_key, use_local_models=True, confidence_threshold=0.7):
+    def __init__(self, api_key, use_local_models=True, confidence_threshold=0.7, recommendation_cache_size=512,
+                 embedding_index_size=10000, embedding_index_dir=None, similarity_threshold=0.92,
+                 inference_socket=None, inference_timeout=10.0, fast_model=None):
+        # Imported here so the web process only pays for the SDK once an analyzer exists
+        import google.generativeai as genai
         genai.configure(api_key=api_key)
         # Use Gemini 2.5 Flash - stable and supports vision
         self.model = genai.GenerativeModel('gemini-2.5-flash')
         
+        # JSON mode where the SDK supports it, local repair + schema validation otherwise
+        self.json_config = json_generation_config()
+        self.analysis_parser = GeminiJSONParser(ANALYSIS_SCHEMA)
+        self.recommendation_parser = GeminiJSONParser(RECOMMENDATIONS_SCHEMA)
+        
+        # LRU of Gemini recommendations keyed by (food, conditions)
+        self.recommendation_cache_size = recommendation_cache_size
+        self._recommendation_cache = OrderedDict()
+        self._recommendation_lock = threading.Lock()
+        
+        # Nearest-neighbour index of earlier analyses by image embedding (0 disables)
+        self.embedding_index_size = embedding_index_size
+        self.embedding_index_dir = embedding_index_dir
+        self.similarity_threshold = similarity_threshold
+        self.embedding_index = None
+        self._embedding_index_lock = threading.Lock()
+        
         # Initialize local model predictor
         self.use_local_models = use_local_models
         self.confidence_threshold = confidence_threshold
-        
         if use_local_models:
             try:
-                self.local_predictor = LocalModelPredictor(confidence_threshold=confidence_threshold)
+                if inference_socket:
+                    # Models live in a separate inference_server.py process
+                    from inference_client import InferenceClient
+                    self.local_predictor = InferenceClient(inference_socket, timeout=inference_timeout)
+                    print(f"Connected to local inference server at {inference_socket}")
+                else:
+                    from model_predictor import LocalModelPredictor
+                    self.local_predictor = LocalModelPredictor(confidence_threshold=confidence_threshold)
                 print("Local models initialized successfully")
                 print(f"Food-101 dataset has {len(self.local_predictor.class_names)} classes")
             except Exception as e:
@@ -25,55 +56,142 @@ class FoodAnalyzer:
                 self.local_predictor = None
         else:
             self.local_predictor = None
+        
+        # Backbone run alone when shedding load. Defaults to the embedding model so that
+        # similar-image reuse and indexing keep working in the degraded tiers.
+        self.fast_model = fast_model or getattr(self.local_predictor, 'embedding_model', None)
     
-    def analyze_food_image(self, image):
+    def analyze_food_image(self, image, tier=TIER_FULL, full_image=None):
         """
         New Flow: 
-        1. First get prediction from Gemini API
-        2. Then predict with local models
-        3. If local model prediction matches Gemini prediction, use model name
-        4. Otherwise, use "Gemini API" as model name
+        0. Predict with local models; if the image's embedding is close enough to a
+           previously analyzed image, reuse that analysis and skip Gemini
+        1. Get prediction from Gemini API
+        2. If local model prediction matches Gemini prediction, use model name
+        3. Otherwise, use "Gemini API" as model name
+        tier: load-shedding tier (see load_shedder.py). Above TIER_FULL only the fast
+              backbone runs; from TIER_LOCAL_ONLY nutrition comes from the Food-101 table
+              instead of Gemini.
+        full_image: optional callable returning the image at full resolution when `image`
+                    is a reduced decode; called only if Gemini is used
         Returns: dict with food name, confidence, calories, ingredients, nutrition, quality
         """
         
-        # Step 1: Get prediction from Gemini API first
+        # Step 0: Local models first - their embedding lets us reuse earlier analyses
+        local_result = None
+        embedding = None
+        model_types = None if tier == TIER_FULL else [self.fast_model]
+        if self.use_local_models and self.local_predictor:
+            try:
+                print("🔍 Step 0: Predicting with local models...")
+                local_result = self.local_predictor.predict_ensemble(image, model_types=model_types)
+                embedding = self._index_embedding(local_result[3])
+            except Exception as e:
+                print(f"❌ Error with local models: {e}, using Gemini API")
+        
+        if embedding is not None:
+            cached = self.find_similar_analysis(embedding)
+            if cached is not None:
+                return cached
+        
+        if tier >= TIER_LOCAL_ONLY:
+            return self.analyze_from_table(local_result, tier)
+        
+        if full_image is not None:
+            image = full_image()
+        
+        # Step 1: Get prediction from Gemini API
         print("🔍 Step 1: Getting food identification from Gemini API...")
         gemini_food_name = self.get_food_name_from_gemini(image)
         print(f"✅ Gemini identified: {gemini_food_name}")
         
         model_to_use = "Gemini API"  # Default to Gemini
         
-        # Step 2: Try local models if available
-        if self.use_local_models and self.local_predictor and gemini_food_name:
-            try:
-                print("🔍 Step 2: Predicting with local models...")
-                food_name, confidence, model_name, all_predictions = self.local_predictor.predict_ensemble(image)
+        # Step 2: Compare with the local models' prediction
+        if local_result is not None and gemini_food_name:
+            food_name, confidence, model_name, all_predictions = local_result
+            
+            if food_name:
+                # Format both names for comparison (lowercase, replace underscores)
+                gemini_formatted = gemini_food_name.lower().replace(' ', '_').replace('-', '_')
+                local_formatted = food_name.lower().replace(' ', '_').replace('-', '_')
+                
+                print(f"📊 Local model prediction: {food_name} (confidence: {confidence:.2f}, model: {model_name})")
+                print(f"🔍 Comparing: Gemini='{gemini_formatted}' vs Local='{local_formatted}'")
                 
-                if food_name:
-                    # Format both names for comparison (lowercase, replace underscores)
-                    gemini_formatted = gemini_food_name.lower().replace(' ', '_').replace('-', '_')
-                    local_formatted = food_name.lower().replace(' ', '_').replace('-', '_')
-                    
-                    print(f"📊 Local model prediction: {food_name} (confidence: {confidence:.2f}, model: {model_name})")
-                    print(f"🔍 Comparing: Gemini='{gemini_formatted}' vs Local='{local_formatted}'")
-                    
-                    # Step 3: Check if predictions match
-                    if gemini_formatted == local_formatted or gemini_formatted in local_formatted or local_formatted in gemini_formatted:
-                        print(f"✅ MATCH! Using pretrained model: {model_name.upper()}")
-                        model_to_use = model_name.upper()
-                    else:
-                        print(f"❌ NO MATCH! Gemini: '{gemini_food_name}' != Local: '{food_name}'")
-                        print(f"✅ Using Gemini API as model name")
-                        model_to_use = "Gemini API"
+                # Step 3: Check if predictions match
+                if gemini_formatted == local_formatted or gemini_formatted in local_formatted or local_formatted in gemini_formatted:
+                    print(f"✅ MATCH! Using pretrained model: {model_name.upper()}")
+                    model_to_use = model_name.upper()
                 else:
-                    print("⚠️ Local model returned no prediction, using Gemini API")
-                    
-            except Exception as e:
-                print(f"❌ Error with local models: {e}, using Gemini API")
+                    print(f"❌ NO MATCH! Gemini: '{gemini_food_name}' != Local: '{food_name}'")
+                    print(f"✅ Using Gemini API as model name")
+                    model_to_use = "Gemini API"
+            else:
+                print("⚠️ Local model returned no prediction, using Gemini API")
         
         # Step 4: Get full detailed analysis from Gemini
         print(f"🔍 Step 3: Getting detailed analysis from Gemini (Model: {model_to_use})...")
-        return self.get_detailed_analysis_from_gemini(image, gemini_food_name, model_to_use)
+        analysis = self.get_detailed_analysis_from_gemini(image, gemini_food_name, model_to_use)
+        
+        if embedding is not None and 'error' not in analysis:
+            self.remember_analysis(embedding, analysis)
+        return analysis
+    
+    def analyze_from_table(self, local_result, tier=TIER_LOCAL_ONLY):
+        """
+        Local-only analysis: the local prediction with table-based nutrition.
+        Raises ServiceOverloaded when there is no usable local prediction, since
+        Gemini is off-limits at this tier. Without local models every request at
+        this tier is therefore answered with 503.
+        """
+        food_name, confidence, model_name = local_result[:3] if local_result else (None, 0.0, None)
+        analysis = table_analysis(food_name, confidence, model_name.upper()) if food_name else None
+        if analysis is None:
+            raise ServiceOverloaded('Server is overloaded and the image could not be analyzed locally', tier=tier)
+        print(f"✅ Local-only analysis: {food_name} (confidence: {confidence:.2f}, model: {model_name})")
+        return analysis
+    
+    def _index_embedding(self, predictions):
+        """Embedding from the backbone used for the similarity index, if it ran"""
+        for prediction in predictions:
+            if prediction['model'] == self.local_predictor.embedding_model:
+                return prediction.get('embedding')
+        return None
+    
+    def _get_embedding_index(self, dim):
+        if self.embedding_index_size <= 0:
+            return None
+        with self._embedding_index_lock:
+            if self.embedding_index is None or self.embedding_index.dim != dim:
+                from embedding_index import EmbeddingIndex
+                self.embedding_index = EmbeddingIndex(
+                    dim,
+                    capacity=self.embedding_index_size,
+                    threshold=self.similarity_threshold,
+                    path=self.embedding_index_dir
+                )
+            return self.embedding_index
+    
+    def find_similar_analysis(self, embedding):
+        """Return a copy of a stored analysis for a near-identical image, or None"""
+        index = self._get_embedding_index(len(embedding))
+        if index is None:
+            return None
+        cached, similarity = index.search(embedding)
+        if cached is None:
+            return None
+        print(f"♻️ Reusing analysis of a similar image (similarity {similarity:.3f}): {cached.get('foodName')}")
+        analysis = FoodAnalysis(cached)
+        analysis['cacheSimilarity'] = round(similarity, 4)
+        return analysis
+    
+    def remember_analysis(self, embedding, analysis):
+        """Index an analysis by its image embedding for later reuse"""
+        index = self._get_embedding_index(len(embedding))
+        if index is not None:
+            # Serialized on insert, so later per-user changes to `analysis` are not stored
+            index.insert(embedding, analysis)
     
     def get_food_name_from_gemini(self, image):
         """Get just the food name from Gemini API"""
@@ -144,15 +262,8 @@ class FoodAnalyzer:
             Return ONLY valid JSON without markdown formatting.
             """
             
-            response = self.model.generate_content([prompt, image])
-            response_text = response.text.strip()
-            
-            # Clean response
-            response_text = re.sub(r'```json\s*', '', response_text)
-            response_text = re.sub(r'```\s*', '', response_text)
-            response_text = response_text.strip()
-            
-            analysis = json.loads(response_text)
+            response = self.model.generate_content([prompt, image], generation_config=self.json_config)
+            analysis = FoodAnalysis(self.analysis_parser.parse(response.text))
             # Ensure model name is set correctly
             analysis['modelUsed'] = model_used
             print(f"✅ Detailed analysis complete. Food: {food_name}, Model: {model_used}")
@@ -161,7 +272,8 @@ class FoodAnalyzer:
             
         except Exception as e:
             print(f"❌ Error in detailed analysis: {e}")
-            # Fallback to basic Gemini analysis
+            # Fallback to basic Gemini analysis (only reached when local repair failed or the call errored)
+            self.analysis_parser.record_requery()
             return self.analyze_with_gemini(image, "Gemini API", None)
     
     def analyze_with_gemini(self, image, model_used="Gemini API", local_info=None):
@@ -214,26 +326,11 @@ class FoodAnalyzer:
             """
             
             # Generate content with image
-            response = self.model.generate_content([prompt, image])
-            
-            # Extract and parse JSON response
-            response_text = response.text.strip()
-            
-            # Remove markdown code blocks if present
-            response_text = re.sub(r'```json\s*', '', response_text)
-            response_text = re.sub(r'```\s*', '', response_text)
-            response_text = response_text.strip()
-            
-            # Parse JSON
-            analysis = json.loads(response_text)
+            response = self.model.generate_content([prompt, image], generation_config=self.json_config)
             
-            # Validate and ensure all required fields are present
-            required_fields = ['foodName', 'confidence', 'calories', 'ingredients', 
-                             'nutritionalBreakdown', 'foodQualityCycle']
-            
-            for field in required_fields:
-                if field not in analysis:
-                    raise ValueError(f"Missing required field: {field}")
+            # Parse (repairing locally if needed), validate against the schema,
+            # then parse the nutrition strings once
+            analysis = FoodAnalysis(self.analysis_parser.parse(response.text))
             
             # Set the model used - ensure it's always "Gemini API" for this method
             analysis['modelUsed'] = model_used
@@ -241,9 +338,9 @@ class FoodAnalyzer:
             
             return analysis
             
-        except json.JSONDecodeError as e:
+        except JSONRepairError as e:
             print(f"JSON Parse Error: {e}")
-            print(f"Response text: {response_text}")
+            print(f"Response text: {response.text}")
             return {
                 'error': 'Failed to parse AI response',
                 'details': str(e)
@@ -255,10 +352,31 @@ class FoodAnalyzer:
                 'details': str(e)
             }
     
+    def _recommendation_key(self, food_data, health_conditions):
+        # The prompt embeds the whole analysis, so every field of it is part of the key
+        analysis = json.dumps(food_data, sort_keys=True, default=str)
+        conditions = tuple(sorted({' '.join(c.lower().split()) for c in (health_conditions or []) if c.strip()}))
+        return analysis, conditions
+    
+    def json_stats(self):
+        """Parse / repair / re-query counts for Gemini JSON responses"""
+        return {
+            'analysis': self.analysis_parser.stats(),
+            'recommendations': self.recommendation_parser.stats()
+        }
+    
     def get_food_recommendations(self, food_data, health_conditions):
         """
-        Get personalized recommendations based on food and health conditions
+        Get personalized recommendations based on food and health conditions.
+        Results are cached per (analysis, conditions) so repeat combinations skip Gemini.
         """
+        key = self._recommendation_key(food_data, health_conditions)
+        with self._recommendation_lock:
+            cached = self._recommendation_cache.get(key)
+            if cached is not None:
+                self._recommendation_cache.move_to_end(key)
+                return list(cached)
+        
         try:
             prompt = f"""
             Based on this food analysis: {json.dumps(food_data)}
@@ -270,12 +388,14 @@ class FoodAnalyzer:
             Return ONLY valid JSON without any markdown formatting.
             """
             
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            response_text = re.sub(r'```json\s*', '', response_text)
-            response_text = re.sub(r'```\s*', '', response_text)
+            response = self.model.generate_content(prompt, generation_config=self.json_config)
+            recommendations = self.recommendation_parser.parse(response.text)
             
-            recommendations = json.loads(response_text)
+            with self._recommendation_lock:
+                self._recommendation_cache[key] = tuple(recommendations)
+                self._recommendation_cache.move_to_end(key)
+                while len(self._recommendation_cache) > self.recommendation_cache_size:
+                    self._recommendation_cache.popitem(last=False)
             return recommendations
             
         except Exception as e:
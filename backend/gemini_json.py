@@ -0,0 +1,187 @@
+import json
+import re
+import threading
+
+# Expected shape of the nutritional analysis returned by Gemini. Only the fields the
+# analysis can't do without are required; the rest fall back to defaults downstream
+# but are type-checked when present.
+ANALYSIS_SCHEMA = {
+    'type': 'object',
+    'required': ['foodName', 'calories', 'nutritionalBreakdown'],
+    'properties': {
+        'foodName': {'type': 'string'},
+        'confidence': {'type': 'number'},
+        'calories': {'type': ['number', 'string']},
+        'ingredients': {'type': 'array', 'items': {'type': 'string'}},
+        'nutritionalBreakdown': {'type': 'object'},
+        'foodQualityCycle': {'type': 'object'},
+    },
+}
+
+RECOMMENDATIONS_SCHEMA = {'type': 'array', 'items': {'type': 'string'}}
+
+# Markdown fences around the whole response (not ``` inside string values)
+_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$', re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+# Bare values with units such as `"protein": 12g` or `"sodium": 850 mg`
+_UNQUOTED_QUANTITY_RE = re.compile(r'(:\s*)(-?\d+(?:\.\d+)?\s*[A-Za-zµ%]+)(\s*[,}\]\n])')
+# Python literals occasionally emitted instead of JSON ones
+_PY_LITERALS_RE = re.compile(r'(:\s*|\[\s*|,\s*)(True|False|None)\b')
+_PY_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+# Curly quotes used as JSON delimiters, i.e. next to { } [ ] : or , (curly quotes inside values are left alone)
+_SMART_QUOTE_RE = re.compile(r'(?<=[{\[:,])(\s*)[“”„]|[“”„](?=\s*[:,}\]])')
+
+_JSON_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'number': (int, float),
+    'integer': int,
+    'boolean': bool,
+}
+
+
+class JSONRepairError(ValueError):
+    """Raised when a model response cannot be parsed or repaired into valid JSON"""
+
+
+def json_generation_config():
+    """
+    Generation config asking Gemini for JSON output, or None when the installed
+    google-generativeai version does not support response_mime_type.
+    """
+    import google.generativeai as genai
+
+    try:
+        return genai.GenerationConfig(response_mime_type='application/json')
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def compile_schema(schema):
+    """Compile a small JSON-schema subset (type, required, properties, items) into a validator"""
+    expected = schema.get('type')
+    names = tuple(expected) if isinstance(expected, list) else ((expected,) if expected else ())
+    types = tuple(_JSON_TYPES[name] for name in names)
+    allow_bool = 'boolean' in names
+    required = tuple(schema.get('required', ()))
+    properties = tuple((name, compile_schema(sub)) for name, sub in schema.get('properties', {}).items())
+    items = compile_schema(schema['items']) if 'items' in schema else None
+
+    def validate(value, path='$'):
+        # bool is an int subclass, so only accept it where a boolean is expected
+        if types and (not isinstance(value, types) or (isinstance(value, bool) and not allow_bool)):
+            raise JSONRepairError(f"{path}: expected {'/'.join(names)}, got {type(value).__name__}")
+        if isinstance(value, dict):
+            for name in required:
+                if name not in value:
+                    raise JSONRepairError(f"Missing required field: {name}")
+            for name, check in properties:
+                if name in value:
+                    check(value[name], f"{path}.{name}")
+        elif isinstance(value, list) and items is not None:
+            for index, item in enumerate(value):
+                items(item, f"{path}[{index}]")
+
+    return validate
+
+
+def extract_json_value(text):
+    """
+    Return the outermost JSON object or array in `text`, ignoring surrounding prose.
+    Brackets left open by a truncated response are closed.
+    """
+    start = next((i for i, ch in enumerate(text) if ch in '{['), None)
+    if start is None:
+        raise JSONRepairError('No JSON object found in response')
+
+    stack = []
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]':
+            if stack:
+                stack.pop()
+            if not stack:
+                return text[start:i + 1]
+
+    # Truncated output: close the open string and brackets
+    tail = '"' if in_string else ''
+    return text[start:] + tail + ''.join(reversed(stack))
+
+
+def repair_json(text):
+    """Fix common model output faults: smart quotes, trailing commas, bare quantities, Python literals"""
+    text = _SMART_QUOTE_RE.sub(lambda m: (m.group(1) or '') + '"', text)
+    text = _UNQUOTED_QUANTITY_RE.sub(r'\1"\2"\3', text)
+    text = _PY_LITERALS_RE.sub(lambda m: m.group(1) + _PY_LITERALS[m.group(2)], text)
+    text = _TRAILING_COMMA_RE.sub(r'\1', text)
+    return text
+
+
+class GeminiJSONParser:
+    """
+    Parses JSON responses from Gemini: tries the text as-is, then extracts and
+    repairs it locally, then validates against a compiled schema. Keeps counts of
+    clean parses, local repairs, failures and re-queries for reporting.
+    """
+
+    def __init__(self, schema=None):
+        self.validate = compile_schema(schema) if schema else None
+        self._lock = threading.Lock()
+        self._counts = {'total': 0, 'clean': 0, 'repaired': 0, 'failed': 0, 'requeried': 0}
+
+    def parse(self, text):
+        """Return the parsed value, or raise JSONRepairError"""
+        cleaned = _FENCE_RE.sub('', text or '').strip()
+        outcome = 'clean'
+        try:
+            try:
+                value = json.loads(cleaned)
+            except json.JSONDecodeError:
+                outcome = 'repaired'
+                try:
+                    value = json.loads(extract_json_value(cleaned))
+                except json.JSONDecodeError:
+                    try:
+                        value = json.loads(extract_json_value(repair_json(cleaned)))
+                    except json.JSONDecodeError as e:
+                        raise JSONRepairError(f'Could not repair JSON: {e}') from e
+            if self.validate is not None:
+                self.validate(value)
+        except JSONRepairError:
+            self._record('failed')
+            raise
+
+        self._record(outcome)
+        return value
+
+    def record_requery(self):
+        self._record('requeried', count_total=False)
+
+    def stats(self):
+        """Counts plus repair / re-query rates over all parsed responses"""
+        with self._lock:
+            counts = dict(self._counts)
+        total = counts['total'] or 1
+        counts['repairRate'] = round(counts['repaired'] / total, 4)
+        counts['requeryRate'] = round(counts['requeried'] / total, 4)
+        return counts
+
+    def _record(self, outcome, count_total=True):
+        with self._lock:
+            self._counts[outcome] += 1
+            if count_total:
+                self._counts['total'] += 1
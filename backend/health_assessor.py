@@ -1,15 +1,16 @@
 import math
+from nutrition import get_nutrition
+from disease_rules import DISEASE_RULES, rules_for
+from profile_store import HealthProfile
+from recommendations import (
+    calorie_percentage_band, disease_alerts, meal_calorie_band, quality_band,
+    recommendation_templates, render_recommendations
+)
 
 class HealthAssessor:
     def __init__(self):
         self.disease_restrictions = {
-            'diabetes': ['high sugar', 'refined carbs', 'sweet'],
-            'hypertension': ['high sodium', 'salt', 'salty'],
-            'heart disease': ['high fat', 'saturated fat', 'cholesterol'],
-            'obesity': ['high calorie', 'fried', 'fatty'],
-            'kidney disease': ['high sodium', 'high protein', 'potassium'],
-            'celiac disease': ['gluten', 'wheat', 'barley', 'rye'],
-            'lactose intolerance': ['milk', 'dairy', 'lactose', 'cheese'],
+            condition: spec['restrictions'] for condition, spec in DISEASE_RULES.items()
         }
         
         # Unhealthy food keywords for better detection
@@ -60,7 +61,7 @@ class HealthAssessor:
         
         return round(bmr, 2)
     
-    def assess_food_suitability(self, diseases, food_data, bmi_category):
+    def assess_food_suitability(self, diseases, food_data, bmi_category, nutrition=None, rules=None):
         """Assess if food is suitable based on health conditions and BMI"""
         warnings = []
         score = 10
@@ -68,8 +69,9 @@ class HealthAssessor:
         
         food_name = food_data.get('foodName', '').lower()
         ingredients = [ing.lower() for ing in food_data.get('ingredients', [])]
-        nutrition = food_data.get('nutritionalBreakdown', {})
-        calories = food_data.get('calories', 0)
+        if nutrition is None:
+            nutrition = get_nutrition(food_data)
+        calories = nutrition.calories
         
         # Check if food is unhealthy/junk food
         is_unhealthy = any(keyword in food_name or any(keyword in ing for ing in ingredients) 
@@ -93,7 +95,7 @@ class HealthAssessor:
             
             if calories > 700:  # Increased threshold from 600
                 score -= 1.5  # Reduced from 2
-                warnings.append(f"⚠️ High calorie content ({calories} cal) - May hinder weight management")
+                warnings.append(f"⚠️ High calorie content ({calories:g} cal) - May hinder weight management")
             
             # Check for fried foods
             if any(word in food_name for word in ['fried', 'deep fried', 'crispy', 'breaded']):
@@ -101,77 +103,10 @@ class HealthAssessor:
                     score -= 1.5  # Reduced from 2
                 warnings.append("❌ Fried foods are not recommended for weight management")
         
-        # Extract nutritional values safely
-        def extract_number(value_str):
-            if isinstance(value_str, (int, float)):
-                return float(value_str)
-            return float(''.join(filter(str.isdigit, str(value_str)))) if value_str else 0
-        
-        sodium_value = extract_number(nutrition.get('sodium', '0mg'))
-        sugar_value = extract_number(nutrition.get('sugar', '0g'))
-        fat_value = extract_number(nutrition.get('fats', '0g'))
-        saturated_fat = extract_number(nutrition.get('saturatedFat', '0g'))
-        
-        # Disease-specific checks
-        for disease in (diseases or []):
-            disease_lower = disease.lower()
-            
-            if disease_lower in self.disease_restrictions:
-                restrictions = self.disease_restrictions[disease_lower]
-                
-                # Check disease-specific restrictions
-                if 'diabetes' in disease_lower or 'diabetic' in disease_lower:
-                    if sugar_value > 20:  # Increased threshold from 15
-                        score -= 2.5  # Reduced from 3
-                        warnings.append(f"❌ High sugar content ({sugar_value}g) - Dangerous for diabetes")
-                    elif sugar_value > 15:
-                        score -= 1
-                        warnings.append(f"⚠️ Moderate sugar content ({sugar_value}g) - Monitor intake")
-                    if is_unhealthy and not penalty_applied:
-                        score -= 1.5  # Reduced from 2
-                        warnings.append("❌ Processed foods can spike blood sugar levels")
-                
-                if 'hypertension' in disease_lower or 'blood pressure' in disease_lower:
-                    if sodium_value > 800:  # Increased threshold from 600
-                        score -= 2.5  # Reduced from 3
-                        warnings.append(f"❌ Very high sodium ({sodium_value}mg) - Dangerous for hypertension")
-                    elif sodium_value > 500:  # Increased from 400
-                        score -= 1.5  # Reduced from 2
-                        warnings.append(f"⚠️ High sodium ({sodium_value}mg) - Monitor intake")
-                
-                if 'heart' in disease_lower or 'cardiac' in disease_lower:
-                    if fat_value > 25 or saturated_fat > 12:  # Increased thresholds
-                        score -= 2.5  # Reduced from 3
-                        warnings.append(f"❌ High fat content - Not suitable for heart conditions")
-                    elif fat_value > 20 or saturated_fat > 10:
-                        score -= 1
-                        warnings.append(f"⚠️ Moderate fat content - Monitor intake")
-                    if is_unhealthy and not penalty_applied:
-                        score -= 1.5  # Reduced from 2
-                        warnings.append("❌ Processed foods increase cardiovascular risk")
-                
-                if 'obesity' in disease_lower:
-                    if is_unhealthy and not penalty_applied:
-                        score -= 2.5  # Reduced from 4
-                        warnings.append("❌ STRONGLY NOT RECOMMENDED - Junk food will worsen obesity")
-                    elif is_unhealthy:
-                        warnings.append("❌ STRONGLY NOT RECOMMENDED - Junk food will worsen obesity")
-                    if calories > 600:  # Increased threshold from 500
-                        score -= 1.5  # Reduced from 2
-                        warnings.append(f"❌ High calorie meal ({calories} cal) - Choose lower calorie options")
-        
-        # Additional nutritional warnings (only if not already penalized)
-        if sodium_value > 1000 and not any('sodium' in w.lower() for w in warnings):
-            score -= 1.5  # Reduced from 2
-            warnings.append(f"⚠️ Extremely high sodium ({sodium_value}mg) - Daily limit is 2300mg")
-        
-        if sugar_value > 30 and not any('sugar' in w.lower() for w in warnings):  # Increased threshold from 25
-            score -= 1.5  # Reduced from 2
-            warnings.append(f"⚠️ Very high sugar content ({sugar_value}g) - Limit sugar intake")
-        
-        if fat_value > 35 and not any('fat' in w.lower() for w in warnings):  # Increased threshold from 30
-            score -= 0.5  # Reduced from 1
-            warnings.append(f"⚠️ High fat content ({fat_value}g)")
+        # Disease-specific and general nutrient checks from the compiled rule table
+        if rules is None:
+            rules = rules_for(diseases)
+        score -= rules.evaluate(nutrition, is_unhealthy, penalty_applied, warnings)
         
         score = max(0, min(10, score))
         suitable = score >= 5
@@ -202,28 +137,46 @@ class HealthAssessor:
         
         return round(daily_calories, 0)
     
-    def assess_health(self, height, weight, diseases, food_data):
+    def build_profile(self, height, weight, diseases, profile_id=None):
+        """Compute BMI, BMR, calorie needs and disease rules for a user once"""
+        bmi, bmi_category = self.calculate_bmi(height, weight)
+        return HealthProfile(
+            profile_id=profile_id,
+            height=height,
+            weight=weight,
+            diseases=diseases or [],
+            bmi=bmi,
+            bmi_category=bmi_category,
+            bmr=self.calculate_bmr(height, weight),
+            daily_calories=self.calculate_calorie_needs(height, weight)
+        )
+    
+    def assess_health(self, height, weight, diseases, food_data, profile=None):
         """
-        Perform comprehensive health assessment
+        Perform comprehensive health assessment.
+        Pass a precomputed HealthProfile to skip the BMI/calorie/rules stage.
         """
         try:
-            # Calculate BMI
-            bmi, bmi_category = self.calculate_bmi(height, weight)
-            
-            # Calculate daily calorie needs
-            daily_calories = self.calculate_calorie_needs(height, weight)
+            if profile is None:
+                profile = self.build_profile(height, weight, diseases)
+            diseases = profile.diseases
+            bmi, bmi_category = profile.bmi, profile.bmi_category
+            daily_calories = profile.daily_calories
             
             # Get food calories
             food_calories = food_data.get('calories', 0)
+            nutrition = get_nutrition(food_data)
             
             # Assess food suitability with BMI consideration
-            suitability = self.assess_food_suitability(diseases, food_data, bmi_category)
+            suitability = self.assess_food_suitability(
+                diseases, food_data, bmi_category, nutrition, profile.rules
+            )
             
             # Calculate percentage of daily calories
-            calorie_percentage = round((food_calories / daily_calories * 100), 1) if daily_calories else 0
+            calorie_percentage = round((nutrition.calories / daily_calories * 100), 1) if daily_calories else 0
             
             # Calculate dynamic food quality score
-            food_quality_score = self._calculate_food_quality(food_data, bmi_category, diseases)
+            food_quality_score = self._calculate_food_quality(food_data, bmi_category, diseases, nutrition)
             
             # Update food quality in data
             if 'foodQualityCycle' not in food_data:
@@ -232,7 +185,7 @@ class HealthAssessor:
             
             # Generate personalized recommendations
             recommendations = self._generate_recommendations(
-                bmi_category, diseases, suitability, food_data, calorie_percentage
+                bmi_category, diseases, suitability, food_data, calorie_percentage, nutrition
             )
             
             # Overall health score (0-10) - more strict for unhealthy foods
@@ -260,25 +213,42 @@ class HealthAssessor:
                 'details': str(e)
             }
     
-    def _calculate_food_quality(self, food_data, bmi_category, diseases):
+    def assess_day(self, profile, totals):
+        """
+        Day-level assessment of a profile's logged meals.
+        totals: MealTotals for one day (or an average day, see MealTotals.per_day)
+        """
+        warnings = []
+        calorie_percentage = round(totals.calorie_percentage, 1)
+        if calorie_percentage > 100:
+            if calorie_percentage > 120 or profile.bmi_category in ['Overweight', 'Obese']:
+                warnings.append(f"❌ {calorie_percentage:g}% of your daily calorie needs eaten - Well over your target")
+            else:
+                warnings.append(f"⚠️ {calorie_percentage:g}% of your daily calorie needs eaten - Slightly over your target")
+        
+        profile.daily_rules.evaluate(totals.nutrition, False, False, warnings)
+        
+        return {
+            'dailyCalorieNeeds': profile.daily_calories,
+            'remainingCalories': round(max(profile.daily_calories - totals.nutrition.calories, 0)),
+            'caloriePercentage': calorie_percentage,
+            'warnings': warnings
+        }
+    
+    def _calculate_food_quality(self, food_data, bmi_category, diseases, nutrition=None):
         """Calculate food quality score based on nutritional content and user profile"""
         score = 5.0  # Start neutral
         
         food_name = food_data.get('foodName', '').lower()
-        nutrition = food_data.get('nutritionalBreakdown', {})
-        calories = food_data.get('calories', 0)
-        
-        # Extract nutritional values
-        def extract_number(value_str):
-            if isinstance(value_str, (int, float)):
-                return float(value_str)
-            return float(''.join(filter(str.isdigit, str(value_str)))) if value_str else 0
+        if nutrition is None:
+            nutrition = get_nutrition(food_data)
+        calories = nutrition.calories
         
-        protein = extract_number(nutrition.get('protein', '0g'))
-        fiber = extract_number(nutrition.get('fiber', '0g'))
-        sugar = extract_number(nutrition.get('sugar', '0g'))
-        sodium = extract_number(nutrition.get('sodium', '0mg'))
-        fat = extract_number(nutrition.get('fats', '0g'))
+        protein = nutrition.protein
+        fiber = nutrition.fiber
+        sugar = nutrition.sugar
+        sodium = nutrition.sodium
+        fat = nutrition.fats
         
         # Check for unhealthy/junk food
         is_junk = any(keyword in food_name for keyword in self.unhealthy_keywords)
@@ -347,75 +317,22 @@ class HealthAssessor:
         
         return round(max(0.0, min(10.0, overall)), 1)
     
-    def _generate_recommendations(self, bmi_category, diseases, suitability, food_data, calorie_percentage):
-        """Generate personalized health recommendations"""
-        recommendations = []
+    def _generate_recommendations(self, bmi_category, diseases, suitability, food_data, calorie_percentage,
+                                  nutrition=None):
+        """Generate personalized health recommendations from the precomputed decision table"""
         is_junk = suitability.get('isJunkFood', False)
-        food_name = food_data.get('foodName', '')
-        calories = food_data.get('calories', 0)
-        
-        # Strong warnings for junk food + obesity/overweight
-        if (bmi_category in ['Overweight', 'Obese']) and is_junk:
-            recommendations.append(f"🚫 AVOID THIS FOOD: {food_name} is junk food and will worsen your weight condition")
-            recommendations.append("💡 Choose grilled, steamed, or baked options with vegetables instead")
-            recommendations.append("🏃 Increase physical activity to burn excess calories")
-        
-        # BMI-based recommendations
-        if bmi_category == 'Underweight':
-            recommendations.append("✅ Increase caloric intake with nutrient-dense foods like nuts, avocados, and lean proteins")
-            if not is_junk:
-                recommendations.append(f"✅ This food can be part of your weight gain diet")
-        
-        elif bmi_category == 'Overweight':
-            if not is_junk and calories < 500:
-                recommendations.append("✅ Good choice! Focus on similar low-calorie, nutritious meals")
-            recommendations.append("🎯 Target: Reduce 500 calories per day for healthy weight loss")
-            if calorie_percentage > 35:
-                recommendations.append("⚠️ This meal is a large portion of your daily calories - reduce serving size")
-        
-        elif bmi_category == 'Obese':
-            if is_junk:
-                recommendations.append("🚨 CRITICAL: This food will significantly hinder your weight loss goals")
-            recommendations.append("💪 Urgent: Adopt a calorie deficit diet (500-1000 cal/day reduction)")
-            recommendations.append("🥗 Prioritize: Vegetables, lean proteins, whole grains, and fruits")
-            if calories > 400:
-                recommendations.append(f"❌ This {calories} cal meal is too high - aim for 300-400 cal per meal")
-        
-        # Calorie-based recommendations
-        if calorie_percentage > 50:
-            recommendations.append("⚠️ HIGH CALORIE ALERT: This is >50% of your daily needs - skip or drastically reduce portion")
-        elif calorie_percentage > 40:
-            recommendations.append("⚠️ This meal uses 40%+ of daily calories - balance with light meals")
-        
-        # Disease-specific urgent recommendations
-        if diseases:
-            for disease in diseases:
-                if 'diabetes' in disease.lower():
-                    if is_junk:
-                        recommendations.append("🚨 DIABETIC ALERT: Junk food causes dangerous blood sugar spikes")
-                if 'heart' in disease.lower():
-                    if is_junk:
-                        recommendations.append("❤️ HEART RISK: High-fat processed foods increase cardiovascular risk")
-        
-        # Warnings from suitability check
-        if suitability['warnings']:
-            recommendations.append("⚠️ HEALTH WARNINGS: Review all warnings above carefully before consuming")
-        
-        # Food quality recommendations
+        if nutrition is None:
+            nutrition = get_nutrition(food_data)
         health_score = food_data.get('foodQualityCycle', {}).get('healthScore', 5)
-        if health_score < 4:
-            recommendations.append("❌ POOR FOOD QUALITY: Choose fresher, less processed alternatives")
-        elif health_score < 6:
-            recommendations.append("⚠️ Consider healthier preparation methods (grilled, steamed, baked)")
-        
-        # Positive reinforcement for good choices
-        if not is_junk and suitability['suitable'] and health_score >= 7:
-            recommendations.append("✅ EXCELLENT CHOICE! This food aligns well with your health goals")
-            if bmi_category == 'Normal weight':
-                recommendations.append("👍 Keep making healthy choices like this to maintain your weight")
-        
-        # Always provide an actionable tip
-        if not recommendations:
-            recommendations.append("💡 Maintain a balanced diet with variety in nutrients")
-        
-        return recommendations[:7]  # Limit to 7 recommendations
+        
+        templates = recommendation_templates(
+            bmi_category,
+            bool(is_junk),
+            calorie_percentage_band(calorie_percentage),
+            meal_calorie_band(nutrition.calories),
+            disease_alerts(tuple(diseases or ())),
+            bool(suitability['warnings']),
+            bool(suitability['suitable']),
+            quality_band(health_score)
+        )
+        return render_recommendations(templates, food_data.get('foodName', ''), nutrition.calories)
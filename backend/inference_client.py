@@ -0,0 +1,149 @@
+import atexit
+import queue
+import socket
+import threading
+from multiprocessing import shared_memory
+from PIL import Image
+import inference_protocol as protocol
+
+
+class _Connection:
+    """One socket to the inference server plus the shared-memory image buffer it sends from"""
+
+    def __init__(self, socket_path, side, connect_timeout, timeout):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(connect_timeout)
+        self.sock.connect(socket_path)
+        self.sock.settimeout(timeout)
+        self.side = side
+        self.shm = shared_memory.SharedMemory(create=True, size=side * side * 3) if side else None
+
+    def request(self, op, side=0, shm_name='', model_mask=0):
+        protocol.send_request(self.sock, op, side, shm_name, model_mask)
+        return protocol.read_response(self.sock)[1]
+
+    def close(self):
+        try:
+            self.sock.close()
+        finally:
+            if self.shm is not None:
+                self.shm.close()
+                self.shm.unlink()
+
+
+class InferenceClient:
+    """
+    Thin client for inference_server.py, usable wherever FoodAnalyzer expects a
+    LocalModelPredictor. Images are resized here to the server's input side and
+    handed over through pooled shared-memory buffers; only small binary frames go
+    over the Unix socket. Broken or timed-out connections are discarded and
+    replaced on the next request.
+    """
+
+    def __init__(self, socket_path, pool_size=4, timeout=10.0, connect_timeout=2.0):
+        self.socket_path = socket_path
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._idle = queue.LifoQueue()
+        self._open = 0
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'errors': 0}
+
+        # Server metadata; fetched eagerly so a missing server fails at startup
+        conn = _Connection(socket_path, 0, connect_timeout, timeout)
+        try:
+            metadata = protocol.unpack_hello(conn.request(protocol.OP_HELLO))
+        finally:
+            conn.close()
+        self.class_names = metadata['classNames']
+        self.model_types = metadata['modelTypes']
+        self.embedding_model = metadata['embeddingModel']
+        self.side = metadata['inputSide']
+        atexit.register(self.close)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_open = self._open < self.pool_size
+            if can_open:
+                self._open += 1
+        if can_open:
+            try:
+                return _Connection(self.socket_path, self.side, self.connect_timeout, self.timeout)
+            except Exception:
+                with self._lock:
+                    self._open -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError('No inference connection available')
+
+    def _discard(self, conn):
+        with self._lock:
+            self._open -= 1
+        conn.close()
+
+    def _to_pixels(self, image):
+        if not isinstance(image, Image.Image):
+            image = Image.open(image) if isinstance(image, str) else Image.fromarray(image)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        if image.size != (self.side, self.side):
+            image = image.resize((self.side, self.side), Image.BILINEAR, reducing_gap=2.0)
+        return image.tobytes()
+
+    def predict_ensemble(self, image, model_types=None):
+        """Same contract as LocalModelPredictor.predict_ensemble"""
+        model_mask = 0
+        if model_types:
+            model_mask = sum(1 << i for i, m in enumerate(self.model_types) if m in model_types)
+            if not model_mask:
+                return None, 0.0, None, []
+
+        pixels = self._to_pixels(image)
+        conn = self._acquire()
+        try:
+            conn.shm.buf[:len(pixels)] = pixels
+            payload = conn.request(protocol.OP_PREDICT, self.side, conn.shm.name, model_mask)
+        except Exception:
+            self._discard(conn)
+            with self._lock:
+                self._stats['errors'] += 1
+            raise
+        self._idle.put(conn)
+        with self._lock:
+            self._stats['requests'] += 1
+
+        packed, embedding = protocol.unpack_predictions(payload)
+        predictions = []
+        for model_index, class_index, confidence in packed:
+            model_type = self.model_types[model_index]
+            predictions.append({
+                'food_name': self.class_names[class_index],
+                'confidence': confidence,
+                'model': model_type,
+                'embedding': embedding if model_type == self.embedding_model else None
+            })
+
+        if not predictions:
+            return None, 0.0, None, []
+        predictions.sort(key=lambda x: x['confidence'], reverse=True)
+        best = predictions[0]
+        return best['food_name'], best['confidence'], best['model'], predictions
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, socket=self.socket_path, openConnections=self._open)
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
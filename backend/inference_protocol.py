@@ -0,0 +1,110 @@
+"""
+Binary protocol between web workers and the local inference server.
+
+Every message is a fixed header followed by a payload. Image pixels never go
+through the socket: the client writes a pre-resized (side x side x 3) uint8
+image into a shared-memory segment and sends only the segment's name.
+
+Request:   MAGIC, VERSION, op, model mask, side, name length | shared-memory name (utf-8)
+Response:  MAGIC, status, op, payload length     | payload
+
+PREDICT payload: prediction count, embedding length
+                 | per prediction: model index, class index, confidence
+                 | embedding as little-endian float32
+HELLO payload:   JSON metadata (class names, model types, input side, embedding model)
+ERROR payload:   utf-8 message
+
+The model mask selects models by their index in the HELLO model types
+(bit i = model i); 0 runs every model.
+"""
+import json
+import struct
+import numpy as np
+
+MAGIC = b'FDIN'
+VERSION = 2
+
+OP_HELLO = 1
+OP_PREDICT = 2
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+REQUEST_HEADER = struct.Struct('!4sBBBHH')
+RESPONSE_HEADER = struct.Struct('!4sBBI')
+PREDICTION_COUNTS = struct.Struct('!BH')
+PREDICTION = struct.Struct('!BHf')
+
+
+class ProtocolError(ConnectionError):
+    """Malformed frame or unexpected peer behaviour"""
+
+
+def recv_exact(sock, size):
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(remaining)
+        if not chunk:
+            raise ConnectionError('Connection closed by peer')
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_request(sock, op, side=0, shm_name='', model_mask=0):
+    name = shm_name.encode('utf-8')
+    sock.sendall(REQUEST_HEADER.pack(MAGIC, VERSION, op, model_mask, side, len(name)) + name)
+
+
+def read_request(sock):
+    """Return (op, side, shm_name, model_mask); raises ConnectionError on EOF"""
+    magic, version, op, model_mask, side, name_length = REQUEST_HEADER.unpack(recv_exact(sock, REQUEST_HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ProtocolError('Bad request header')
+    name = recv_exact(sock, name_length).decode('utf-8') if name_length else ''
+    return op, side, name, model_mask
+
+
+def send_response(sock, op, payload=b'', status=STATUS_OK):
+    sock.sendall(RESPONSE_HEADER.pack(MAGIC, status, op, len(payload)) + payload)
+
+
+def read_response(sock):
+    """Return (op, payload); raises RuntimeError with the server's message on error status"""
+    magic, status, op, length = RESPONSE_HEADER.unpack(recv_exact(sock, RESPONSE_HEADER.size))
+    if magic != MAGIC:
+        raise ProtocolError('Bad response header')
+    payload = recv_exact(sock, length) if length else b''
+    if status != STATUS_OK:
+        raise RuntimeError(payload.decode('utf-8', 'replace'))
+    return op, payload
+
+
+def pack_predictions(predictions, embedding):
+    """predictions: [(model index, class index, confidence)], embedding: 1-D float array or None"""
+    embedding = np.zeros(0, dtype='<f4') if embedding is None else np.asarray(embedding, dtype='<f4')
+    parts = [PREDICTION_COUNTS.pack(len(predictions), embedding.size)]
+    parts.extend(PREDICTION.pack(*prediction) for prediction in predictions)
+    parts.append(embedding.tobytes())
+    return b''.join(parts)
+
+
+def unpack_predictions(payload):
+    """Inverse of pack_predictions; the embedding is None when the server sent none"""
+    count, dim = PREDICTION_COUNTS.unpack_from(payload, 0)
+    offset = PREDICTION_COUNTS.size
+    predictions = []
+    for _ in range(count):
+        predictions.append(PREDICTION.unpack_from(payload, offset))
+        offset += PREDICTION.size
+    embedding = np.frombuffer(payload, dtype='<f4', count=dim, offset=offset).astype(np.float32) if dim else None
+    return predictions, embedding
+
+
+def pack_hello(metadata):
+    return json.dumps(metadata).encode('utf-8')
+
+
+def unpack_hello(payload):
+    return json.loads(payload.decode('utf-8'))
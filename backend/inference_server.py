@@ -0,0 +1,194 @@
+"""
+Standalone inference service for the local models.
+
+Runs LocalModelPredictor in its own process on a Unix domain socket so web
+workers don't each hold ConvNeXt-B, EfficientNetV2-M and ViT-B-16 in memory or
+block request threads on forward passes. Requests arriving close together are
+batched into one forward pass per model.
+
+Usage: python inference_server.py [--socket /tmp/food-inference.sock] [--max-batch 8] [--max-wait-ms 5]
+Web workers use it when INFERENCE_SOCKET is set (see inference_client.py).
+"""
+import argparse
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from dotenv import load_dotenv
+from model_predictor import LocalModelPredictor
+import inference_protocol as protocol
+
+DEFAULT_SOCKET = '/tmp/food-inference.sock'
+
+
+class BatchingPredictor:
+    """Collects single-image requests and runs them through the models in batches"""
+
+    def __init__(self, predictor, max_batch=8, max_wait_ms=5):
+        self.predictor = predictor
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.side = max(predictor.input_sizes.values())
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, pixels, model_types=None):
+        """
+        Queue a (side, side, 3) uint8 image; returns a Future of its prediction list.
+        model_types: only run (and return) these models, default all
+        """
+        future = Future()
+        self._queue.put((pixels, model_types, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        futures = [future for _, _, future in batch]
+        try:
+            # Run the union of the requested models over the whole batch
+            requested = [model_types for _, model_types, _ in batch]
+            if any(model_types is None for model_types in requested):
+                model_types = list(self.predictor.MODEL_TYPES)
+            else:
+                needed = set().union(*requested)
+                model_types = [m for m in self.predictor.MODEL_TYPES if m in needed]
+
+            pixels = np.stack([image for image, _, _ in batch])
+            preprocessor = self.predictor.preprocessor
+            tensors = {size: preprocessor.normalize_batch(pixels, size)
+                       for size in {self.predictor.input_sizes[m] for m in model_types}}
+            results = self.predictor.predict_batch(tensors, model_types)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, wanted, predictions in zip(futures, requested, results):
+            if wanted is not None:
+                predictions = [p for p in predictions if p['model'] in wanted]
+            future.set_result(predictions)
+
+
+class InferenceRequestHandler(socketserver.BaseRequestHandler):
+    """Serves one client connection until it closes"""
+
+    def setup(self):
+        self.segments = {}
+
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                op, side, shm_name, model_mask = protocol.read_request(self.request)
+            except ConnectionError:
+                return
+
+            try:
+                if op == protocol.OP_HELLO:
+                    protocol.send_response(self.request, op, protocol.pack_hello(server.metadata()))
+                elif op == protocol.OP_PREDICT:
+                    protocol.send_response(self.request, op, self._predict(side, shm_name, model_mask))
+                else:
+                    raise ValueError(f'Unknown op {op}')
+            except ConnectionError:
+                return
+            except Exception as e:
+                protocol.send_response(self.request, op, str(e).encode('utf-8'), protocol.STATUS_ERROR)
+
+    def _predict(self, side, shm_name, model_mask):
+        server = self.server
+        if side != server.batcher.side:
+            raise ValueError(f'Expected {server.batcher.side}px images, got {side}px')
+
+        model_types = None
+        if model_mask:
+            model_types = {m for i, m in enumerate(server.predictor.MODEL_TYPES) if model_mask & (1 << i)}
+
+        pixels = np.ndarray((side, side, 3), dtype=np.uint8, buffer=self._segment(shm_name).buf)
+        # The client waits for this response before reusing its buffer, so no copy is needed
+        predictions = server.batcher.submit(pixels, model_types).result()
+
+        packed = [(server.model_index[p['model']], server.class_index[p['food_name']], p['confidence'])
+                  for p in predictions]
+        embedding = next((p['embedding'] for p in predictions
+                          if p['model'] == server.predictor.embedding_model), None)
+        return protocol.pack_predictions(packed, embedding)
+
+    def _segment(self, name):
+        segment = self.segments.get(name)
+        if segment is None:
+            segment = shared_memory.SharedMemory(name=name)
+            # The client owns and unlinks the segment; don't let our tracker remove it
+            resource_tracker.unregister(segment._name, 'shared_memory')
+            self.segments[name] = segment
+        return segment
+
+    def finish(self):
+        for segment in self.segments.values():
+            segment.close()
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, predictor, max_batch=8, max_wait_ms=5):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.predictor = predictor
+        self.model_index = {name: i for i, name in enumerate(predictor.MODEL_TYPES)}
+        self.class_index = {name: i for i, name in enumerate(predictor.class_names)}
+        self.batcher = BatchingPredictor(predictor, max_batch=max_batch, max_wait_ms=max_wait_ms)
+        super().__init__(socket_path, InferenceRequestHandler)
+
+    def metadata(self):
+        return {
+            'classNames': self.predictor.class_names,
+            'modelTypes': list(self.predictor.MODEL_TYPES),
+            'embeddingModel': self.predictor.embedding_model,
+            'inputSide': self.batcher.side,
+        }
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--socket', default=os.getenv('INFERENCE_SOCKET', DEFAULT_SOCKET))
+    parser.add_argument('--max-batch', type=int, default=int(os.getenv('INFERENCE_MAX_BATCH', 8)))
+    parser.add_argument('--max-wait-ms', type=float, default=float(os.getenv('INFERENCE_MAX_WAIT_MS', 5)))
+    args = parser.parse_args()
+
+    predictor = LocalModelPredictor(
+        confidence_threshold=float(os.getenv('MODEL_CONFIDENCE_THRESHOLD', 0.7))
+    )
+    for model_type in predictor.MODEL_TYPES:
+        predictor.load_model(model_type)
+
+    server = InferenceServer(args.socket, predictor, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    print(f"Inference server listening on {args.socket} (batch up to {args.max_batch}, wait {args.max_wait_ms}ms)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == '__main__':
+    main()
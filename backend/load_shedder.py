@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Degradation tiers, cheapest last
+TIER_FULL = 0              # full ensemble + detailed Gemini analysis
+TIER_SINGLE_BACKBONE = 1   # one local backbone (FAST_MODEL) + detailed Gemini analysis
+TIER_LOCAL_ONLY = 2        # one local backbone + table-based nutrition, no Gemini
+TIER_SHED = 3              # reject with 503 + Retry-After
+TIER_NAMES = ('full', 'single_backbone', 'local_only', 'shed')
+
+
+def queue_thresholds_for(threads):
+    """
+    Default in-flight thresholds for a worker with `threads` request threads.
+    In-flight requests can never exceed the thread count (the rest wait in the
+    server's backlog), so the tiers start at half, three quarters and all of it.
+    """
+    return max(1, threads // 2), max(1, threads * 3 // 4), max(1, threads)
+
+
+class ServiceOverloaded(Exception):
+    """
+    Raised when a request is shed; the API answers 503 with Retry-After (seconds, or
+    the shedder's default). `tier` is the tier the request was handled at.
+    """
+
+    def __init__(self, message='Server is overloaded - please retry shortly', retry_after=None, tier=TIER_SHED):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.tier = tier
+
+
+class LoadShedder:
+    """
+    Picks the degradation tier for each analysis request from the number of
+    requests in flight and the p95 latency of recent ones.
+
+    Tier n+1 is entered as soon as either signal reaches its n-th threshold
+    (escalation can skip tiers). Stepping back down is one tier at a time, only
+    after `min_dwell_s` in the current tier and only once both signals are below
+    `recovery_ratio` times the thresholds that put us there, so the controller
+    doesn't flap around a single threshold.
+    """
+
+    def __init__(self, queue_thresholds=(4, 8, 16), p95_thresholds_ms=(20000, 40000, 60000),
+                 recovery_ratio=0.5, min_dwell_s=10.0, window_s=60.0, min_samples=5,
+                 retry_after_s=5, enabled=True):
+        self.queue_thresholds = tuple(queue_thresholds)
+        self.p95_thresholds_ms = tuple(p95_thresholds_ms)
+        self.recovery_ratio = recovery_ratio
+        self.min_dwell_s = min_dwell_s
+        self.window_s = window_s
+        self.min_samples = min_samples
+        self.retry_after_s = retry_after_s
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._tier = TIER_FULL
+        self._since = time.monotonic()
+        self._in_flight = 0
+        self._latencies = deque(maxlen=512)  # (finish time, latency ms)
+        self._p95_ms = 0.0
+        self._served = [0] * len(TIER_NAMES)
+        self._transitions = 0
+
+    def _level(self, in_flight, p95_ms, scale):
+        """Highest tier whose thresholds (scaled) are reached by either signal"""
+        level = TIER_FULL
+        for tier, (depth, latency) in enumerate(zip(self.queue_thresholds, self.p95_thresholds_ms), start=1):
+            if in_flight >= depth * scale or p95_ms >= latency * scale:
+                level = tier
+        return level
+
+    def _update(self, now):
+        while self._latencies and now - self._latencies[0][0] > self.window_s:
+            self._latencies.popleft()
+        if len(self._latencies) >= self.min_samples:
+            ordered = sorted(latency for _, latency in self._latencies)
+            self._p95_ms = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        else:
+            self._p95_ms = 0.0
+
+        if not self.enabled:
+            return
+        target = self._level(self._in_flight, self._p95_ms, 1.0)
+        if target > self._tier:
+            self._switch(target, now)
+        elif (self._tier > TIER_FULL and now - self._since >= self.min_dwell_s
+              and self._level(self._in_flight, self._p95_ms, self.recovery_ratio) < self._tier):
+            self._switch(self._tier - 1, now)
+
+    def _switch(self, tier, now):
+        print(f"Load shedding: {TIER_NAMES[self._tier]} -> {TIER_NAMES[tier]} "
+              f"(in flight {self._in_flight}, p95 {self._p95_ms:.0f}ms)")
+        self._tier = tier
+        self._since = now
+        self._transitions += 1
+
+    @property
+    def tier(self):
+        with self._lock:
+            self._update(time.monotonic())
+            return self._tier
+
+    @contextmanager
+    def admit(self):
+        """
+        Admit one request and yield the tier it should be served at.
+        Raises ServiceOverloaded instead when the request is shed.
+        """
+        started = time.monotonic()
+        with self._lock:
+            self._in_flight += 1
+            self._update(started)
+            tier = self._tier
+            self._served[tier] += 1
+            if tier == TIER_SHED:
+                self._in_flight -= 1
+        if tier == TIER_SHED:
+            raise ServiceOverloaded(retry_after=self.retry_after_s, tier=tier)
+
+        try:
+            yield tier
+        finally:
+            finished = time.monotonic()
+            with self._lock:
+                self._in_flight -= 1
+                self._latencies.append((finished, (finished - started) * 1000.0))
+                self._update(finished)
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            self._update(now)
+            return {
+                'enabled': self.enabled,
+                'tier': self._tier,
+                'tierName': TIER_NAMES[self._tier],
+                'secondsInTier': round(now - self._since, 1),
+                'inFlight': self._in_flight,
+                'p95Ms': round(self._p95_ms, 1),
+                'samples': len(self._latencies),
+                'transitions': self._transitions,
+                'served': dict(zip(TIER_NAMES, self._served)),
+                'queueThresholds': list(self.queue_thresholds),
+                'p95ThresholdsMs': list(self.p95_thresholds_ms),
+            }
@@ -0,0 +1,170 @@
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from nutrition import NutritionRecord, get_nutrition
+
+# Aggregated per meal, day and week (NutritionRecord fields plus share of daily calorie needs)
+TOTAL_COLUMNS = NutritionRecord.__slots__ + ('calorie_percentage',)
+
+
+def parse_day(value=None):
+    """A YYYY-MM-DD string (or date) as a date; today in UTC when empty. Raises ValueError."""
+    if not value:
+        return datetime.now(timezone.utc).date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip())
+
+
+def week_start(day):
+    """Monday of the ISO week containing `day`"""
+    return day - timedelta(days=day.weekday())
+
+
+class MealTotals:
+    """Running totals for a profile over one day or one week"""
+
+    __slots__ = ('meals', 'days', 'nutrition', 'calorie_percentage')
+
+    def __init__(self, meals=0, days=0, nutrition=None, calorie_percentage=0.0):
+        self.meals = meals
+        self.days = days
+        self.nutrition = nutrition or NutritionRecord()
+        self.calorie_percentage = calorie_percentage
+
+    @classmethod
+    def from_row(cls, row, days=1):
+        if row is None:
+            return cls()
+        meals, *values = row
+        return cls(meals=meals, days=days, nutrition=NutritionRecord(*values[:-1]), calorie_percentage=values[-1])
+
+    def per_day(self):
+        """Average day of these totals"""
+        days = max(self.days, 1)
+        averaged = NutritionRecord(*(value / days for value in self.nutrition.as_dict().values()))
+        return MealTotals(self.meals / days, 1, averaged, self.calorie_percentage / days)
+
+    def to_dict(self):
+        totals = {name: round(value, 1) for name, value in self.nutrition.as_dict().items()}
+        return {
+            'meals': round(self.meals, 1),
+            'totals': {
+                'calories': totals['calories'],
+                'protein': totals['protein'],
+                'carbohydrates': totals['carbohydrates'],
+                'fats': totals['fats'],
+                'saturatedFat': totals['saturated_fat'],
+                'fiber': totals['fiber'],
+                'sugar': totals['sugar'],
+                'sodium': totals['sodium'],
+            },
+            'caloriePercentage': round(self.calorie_percentage, 1),
+        }
+
+
+class MealLog:
+    """
+    Append-only log of analyzed meals per profile, stored in SQLite (in memory
+    when no `db_path` is given).
+
+    Each insert also adds the meal into running per-day and per-week totals
+    inside the same transaction, so daily and weekly summaries are single-row
+    primary-key reads no matter how long the history is.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path or ':memory:', check_same_thread=False)
+
+        nutrient_columns = ', '.join(f'{name} REAL NOT NULL DEFAULT 0' for name in TOTAL_COLUMNS)
+        self._db.executescript(f"""
+            CREATE TABLE IF NOT EXISTS meals (
+                meal_id INTEGER PRIMARY KEY,
+                profile_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                logged_at REAL NOT NULL,
+                food_name TEXT,
+                model_used TEXT,
+                {nutrient_columns}
+            );
+            CREATE INDEX IF NOT EXISTS meals_by_day ON meals (profile_id, day);
+            CREATE TABLE IF NOT EXISTS daily_totals (
+                profile_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                meals INTEGER NOT NULL DEFAULT 0,
+                {nutrient_columns},
+                PRIMARY KEY (profile_id, day)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS weekly_totals (
+                profile_id TEXT NOT NULL,
+                week_start TEXT NOT NULL,
+                days INTEGER NOT NULL DEFAULT 0,
+                meals INTEGER NOT NULL DEFAULT 0,
+                {nutrient_columns},
+                PRIMARY KEY (profile_id, week_start)
+            ) WITHOUT ROWID;
+        """)
+        self._db.commit()
+
+        columns = ', '.join(TOTAL_COLUMNS)
+        placeholders = ', '.join('?' for _ in TOTAL_COLUMNS)
+        increments = ', '.join(f'{name} = {name} + excluded.{name}' for name in TOTAL_COLUMNS)
+        self._insert_meal = (f"INSERT INTO meals (profile_id, day, logged_at, food_name, model_used, {columns}) "
+                             f"VALUES (?, ?, ?, ?, ?, {placeholders})")
+        self._add_to_day = (f"INSERT INTO daily_totals (profile_id, day, meals, {columns}) "
+                            f"VALUES (?, ?, 1, {placeholders}) "
+                            f"ON CONFLICT (profile_id, day) DO UPDATE SET meals = meals + 1, {increments} "
+                            f"RETURNING meals")
+        self._add_to_week = (f"INSERT INTO weekly_totals (profile_id, week_start, days, meals, {columns}) "
+                             f"VALUES (?, ?, ?, 1, {placeholders}) "
+                             f"ON CONFLICT (profile_id, week_start) DO UPDATE SET "
+                             f"days = days + excluded.days, meals = meals + 1, {increments}")
+        self._select_day = f"SELECT meals, {columns} FROM daily_totals WHERE profile_id = ? AND day = ?"
+        self._select_week = (f"SELECT days, meals, {columns} FROM weekly_totals "
+                             f"WHERE profile_id = ? AND week_start = ?")
+
+    def log(self, profile_id, food_data, calorie_percentage, day=None):
+        """
+        Append one analyzed meal for `profile_id` on `day` (default today, UTC).
+        food_data: the foodAnalysis dict; calorie_percentage: its share of daily needs
+        Returns (meal id, the day's updated MealTotals).
+        """
+        day = parse_day(day)
+        nutrition = get_nutrition(food_data)
+        values = tuple(getattr(nutrition, name) for name in NutritionRecord.__slots__) + (calorie_percentage or 0.0,)
+        with self._lock, self._db:
+            meal_id = self._db.execute(
+                self._insert_meal,
+                (profile_id, day.isoformat(), time.time(), food_data.get('foodName'), food_data.get('modelUsed'))
+                + values
+            ).lastrowid
+            day_meals = self._db.execute(self._add_to_day, (profile_id, day.isoformat()) + values).fetchone()[0]
+            # A day's first meal also counts that day towards the week
+            self._db.execute(self._add_to_week,
+                             (profile_id, week_start(day).isoformat(), int(day_meals == 1)) + values)
+            row = self._db.execute(self._select_day, (profile_id, day.isoformat())).fetchone()
+        return meal_id, MealTotals.from_row(row)
+
+    def day_totals(self, profile_id, day=None):
+        """MealTotals for one day (empty when nothing was logged)"""
+        day = parse_day(day)
+        with self._lock:
+            row = self._db.execute(self._select_day, (profile_id, day.isoformat())).fetchone()
+        return MealTotals.from_row(row)
+
+    def week_totals(self, profile_id, day=None):
+        """MealTotals for the Monday-to-Sunday week containing `day`"""
+        start = week_start(parse_day(day))
+        with self._lock:
+            row = self._db.execute(self._select_week, (profile_id, start.isoformat())).fetchone()
+        if row is None:
+            return MealTotals()
+        return MealTotals.from_row(row[1:], days=row[0])
+
+    def close(self):
+        with self._lock:
+            self._db.close()
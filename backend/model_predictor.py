@@ -1,18 +1,24 @@
 import torch
-import torchvision.transforms as transforms
 import torchvision.models as models
-from PIL import Image
-import timm
 import os
 import json
+import threading
+from preprocessing import ImagePreprocessor
+from resource_manager import get_resources
 
 class LocalModelPredictor:
-    def __init__(self, confidence_threshold=0.7):
+    MODEL_TYPES = ('convnext', 'efficientnet', 'vit')
+    
+    def __init__(self, confidence_threshold=0.7, input_sizes=None, resources=None):
         """
         Initialize the local model predictor with pre-trained models
         confidence_threshold: minimum confidence to trust local models (default 0.7)
+        input_sizes: optional {model_type: side} overrides for the model input resolution
+        resources: InferenceResources bounding torch threads and concurrent forwards
+                   (defaults to the process-wide one configured from the environment)
         """
         self.confidence_threshold = confidence_threshold
+        self.resources = resources or get_resources()
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         self.models = {}
         self.model_names = {
@@ -21,12 +27,17 @@ class LocalModelPredictor:
             'vit': 'best_model_ViT-B-16.pth'
         }
         
-        # Define image transforms
-        self.transform = transforms.Compose([
-            transforms.Resize((224, 224)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-        ])
+        # Square input resolution per backbone (all trained at 224)
+        self.input_sizes = {'convnext': 224, 'efficientnet': 224, 'vit': 224}
+        self.input_sizes.update(input_sizes or {})
+        
+        # Shared RGB conversion / resize / normalize into pooled tensors
+        self.preprocessor = ImagePreprocessor()
+        
+        # Penultimate-layer features captured by a hook on each classifier head.
+        # Thread-local because the hook runs on whichever thread runs the forward.
+        self._captured = threading.local()
+        self.embedding_model = os.getenv('EMBEDDING_MODEL', 'convnext')
         
         # Load class names (you'll need to provide these based on your training)
         self.load_class_names()
@@ -103,6 +114,7 @@ class LocalModelPredictor:
             
             model = model.to(self.device)
             model.eval()
+            self._classifier_head(model, model_type).register_forward_pre_hook(self._capture_embedding)
             
             self.models[model_type] = model
             print(f"Successfully loaded {model_type} model")
@@ -112,53 +124,106 @@ class LocalModelPredictor:
             print(f"Error loading {model_type} model: {e}")
             return None
     
-    def predict_single_model(self, image, model_type):
-        """Make prediction with a single model"""
+    def _classifier_head(self, model, model_type):
+        """The final Linear layer, whose input is the penultimate-layer embedding"""
+        if model_type == 'convnext':
+            return model.classifier[2]
+        if model_type == 'efficientnet':
+            return model.classifier[1]
+        return model.heads.head
+    
+    def _capture_embedding(self, module, inputs):
+        self._captured.embedding = inputs[0]
+    
+    def predict_single_model(self, image, model_type, img_tensor=None, return_embedding=False):
+        """
+        Make prediction with a single model.
+        img_tensor: already preprocessed input (see predict_ensemble); built from `image` if omitted
+        return_embedding: also return the penultimate-layer embedding as a float32 NumPy vector
+        """
         model = self.load_model(model_type)
         if model is None:
-            return None, 0.0, model_type
+            return (None, 0.0, model_type, None) if return_embedding else (None, 0.0, model_type)
+        
+        if img_tensor is None:
+            size = self.input_sizes[model_type]
+            with self.preprocessor.tensors(image, [size]) as tensors:
+                return self.predict_single_model(image, model_type, tensors[size], return_embedding)
         
         try:
-            # Preprocess image
-            if isinstance(image, str):
-                image = Image.open(image).convert('RGB')
-            elif not isinstance(image, Image.Image):
-                image = Image.fromarray(image).convert('RGB')
+            img_tensor = img_tensor.to(self.device)
             
-            img_tensor = self.transform(image).unsqueeze(0).to(self.device)
+            # Make prediction within the CPU concurrency limit
+            confidences, indices, embeddings = self.resources.run(self._forward, model, img_tensor)
+            predicted_class = self.class_names[indices[0]]
             
-            # Make prediction
-            with torch.no_grad():
-                outputs = model(img_tensor)
-                probabilities = torch.nn.functional.softmax(outputs, dim=1)
-                confidence, predicted_idx = torch.max(probabilities, 1)
-                
-                confidence = confidence.item()
-                predicted_class = self.class_names[predicted_idx.item()]
-                
-                return predicted_class, confidence, model_type
+            if return_embedding:
+                return predicted_class, confidences[0], model_type, embeddings[0]
+            return predicted_class, confidences[0], model_type
                 
         except Exception as e:
             print(f"Error in prediction with {model_type}: {e}")
-            return None, 0.0, model_type
+            return (None, 0.0, model_type, None) if return_embedding else (None, 0.0, model_type)
     
-    def predict_ensemble(self, image):
+    def _forward(self, model, img_tensor):
         """
-        Use ensemble of all models and return best prediction
-        Returns: (food_name, confidence, model_used, all_predictions)
+        Run one forward pass over a (N, 3, H, W) batch.
+        Returns (confidences, class indices, embeddings) with one entry / row per image.
         """
-        predictions = []
-        
-        # Try all models
-        for model_type in ['convnext', 'efficientnet', 'vit']:
-            food_name, confidence, model_name = self.predict_single_model(image, model_type)
-            if food_name is not None:
-                predictions.append({
-                    'food_name': food_name,
-                    'confidence': confidence,
-                    'model': model_name
+        with torch.no_grad():
+            outputs = model(img_tensor)
+            probabilities = torch.nn.functional.softmax(outputs, dim=1)
+            confidence, predicted_idx = torch.max(probabilities, 1)
+            embeddings = self._captured.embedding.float().cpu().numpy().copy()
+            return confidence.tolist(), predicted_idx.tolist(), embeddings
+    
+    def embed(self, image, model_type=None):
+        """Penultimate-layer embedding of an image, or None if the model is unavailable"""
+        return self.predict_single_model(image, model_type or self.embedding_model, return_embedding=True)[3]
+    
+    def predict_batch(self, tensors, model_types=None):
+        """
+        Run every model (or only `model_types`) once over a batch of preprocessed images.
+        tensors: {input size: (N, 3, size, size) tensor}, one entry per input size of the models run
+        Returns a list of N prediction lists ({'food_name', 'confidence', 'model', 'embedding'}).
+        """
+        batch_size = next(iter(tensors.values())).shape[0]
+        results = [[] for _ in range(batch_size)]
+        
+        for model_type in model_types or self.MODEL_TYPES:
+            model = self.load_model(model_type)
+            if model is None:
+                continue
+            try:
+                img_tensor = tensors[self.input_sizes[model_type]].to(self.device)
+                confidences, indices, embeddings = self.resources.run(self._forward, model, img_tensor)
+            except Exception as e:
+                print(f"Error in prediction with {model_type}: {e}")
+                continue
+            for row in range(batch_size):
+                results[row].append({
+                    'food_name': self.class_names[indices[row]],
+                    'confidence': confidences[row],
+                    'model': model_type,
+                    'embedding': embeddings[row]
                 })
         
+        return results
+    
+    def predict_ensemble(self, image, model_types=None):
+        """
+        Use ensemble of all models (or only `model_types`) and return best prediction
+        Returns: (food_name, confidence, model_used, all_predictions)
+        Each entry of all_predictions also carries the model's 'embedding'.
+        """
+        model_types = [m for m in model_types or self.MODEL_TYPES if m in self.model_names]
+        if not model_types:
+            return None, 0.0, None, []
+        
+        # Preprocess once per distinct input size and share it across models
+        with self.preprocessor.tensors(image, [self.input_sizes[m] for m in model_types]) as tensors:
+            predictions = self.predict_batch(tensors, model_types)[0]
+        
         if not predictions:
             return None, 0.0, None, []
         
@@ -0,0 +1,108 @@
+import re
+
+# Leading number (optionally a range like "10-12") followed by an optional unit
+_QUANTITY_RE = re.compile(
+    r'(\d*\.?\d+)(?:\s*(?:-|–|to)\s*\d*\.?\d+)?\s*([a-zµμ]+)?',
+    re.IGNORECASE
+)
+
+# "1,200" is a thousands separator; any other comma between digits ("2,5") is a decimal point
+_THOUSANDS_SEP_RE = re.compile(r'(?<=\d),(?=\d{3}(?!\d))')
+_DECIMAL_COMMA_RE = re.compile(r'(?<=\d),(?=\d)')
+
+# Mass units expressed in milligrams
+_UNIT_TO_MG = {
+    'kg': 1000000.0,
+    'g': 1000.0,
+    'gram': 1000.0,
+    'grams': 1000.0,
+    'mg': 1.0,
+    'mcg': 0.001,
+    'ug': 0.001,
+    'µg': 0.001,
+    'μg': 0.001,
+}
+
+
+def parse_quantity(value, unit='g'):
+    """
+    Parse a nutrient amount such as "12g", "2,5 g", "1,200mg" or 1200 into a float
+    expressed in `unit` ('g' or 'mg'). Values without a recognised mass unit are
+    assumed to already be in `unit`.
+    """
+    if value is None or isinstance(value, bool):
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    text = _DECIMAL_COMMA_RE.sub('.', _THOUSANDS_SEP_RE.sub('', str(value)))
+    match = _QUANTITY_RE.search(text)
+    if not match:
+        return 0.0
+
+    amount = float(match.group(1))
+    source_unit = (match.group(2) or '').lower()
+    if source_unit in _UNIT_TO_MG:
+        amount = amount * _UNIT_TO_MG[source_unit] / _UNIT_TO_MG[unit]
+    return amount
+
+
+class NutritionRecord:
+    """Parsed nutritional values for one analysis (macros in g, sodium in mg)"""
+
+    __slots__ = ('calories', 'protein', 'carbohydrates', 'fats',
+                 'saturated_fat', 'fiber', 'sugar', 'sodium')
+
+    def __init__(self, calories=0.0, protein=0.0, carbohydrates=0.0, fats=0.0,
+                 saturated_fat=0.0, fiber=0.0, sugar=0.0, sodium=0.0):
+        self.calories = calories
+        self.protein = protein
+        self.carbohydrates = carbohydrates
+        self.fats = fats
+        self.saturated_fat = saturated_fat
+        self.fiber = fiber
+        self.sugar = sugar
+        self.sodium = sodium
+
+    @classmethod
+    def from_food_data(cls, food_data):
+        """Build a record from a Gemini-style analysis dict"""
+        nutrition = food_data.get('nutritionalBreakdown') or {}
+        return cls(
+            calories=parse_quantity(food_data.get('calories', 0), unit='g'),
+            protein=parse_quantity(nutrition.get('protein'), unit='g'),
+            carbohydrates=parse_quantity(nutrition.get('carbohydrates'), unit='g'),
+            fats=parse_quantity(nutrition.get('fats'), unit='g'),
+            saturated_fat=parse_quantity(nutrition.get('saturatedFat'), unit='g'),
+            fiber=parse_quantity(nutrition.get('fiber'), unit='g'),
+            sugar=parse_quantity(nutrition.get('sugar'), unit='g'),
+            sodium=parse_quantity(nutrition.get('sodium'), unit='mg'),
+        )
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"NutritionRecord({fields})"
+
+
+class FoodAnalysis(dict):
+    """
+    Analysis dict returned by FoodAnalyzer. Serializes like a plain dict but carries
+    the parsed NutritionRecord so downstream stages don't re-parse the strings.
+    """
+
+    __slots__ = ('nutrition',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.nutrition = NutritionRecord.from_food_data(self)
+
+
+def get_nutrition(food_data):
+    """Return the cached NutritionRecord for an analysis, parsing it if needed"""
+    nutrition = getattr(food_data, 'nutrition', None)
+    if nutrition is None:
+        nutrition = NutritionRecord.from_food_data(food_data)
+    return nutrition
@@ -0,0 +1,145 @@
+from nutrition import FoodAnalysis
+
+# Typical single-serving values for the Food-101 classes, used when the API is
+# shedding load and answers from the local models without asking Gemini.
+# (calories, protein g, carbohydrates g, fats g, saturated fat g, fiber g, sugar g,
+#  sodium mg, preparation, main ingredients)
+FOOD101_NUTRITION = {
+    'apple_pie': (410, 4, 58, 19, 8, 2, 30, 330, 'baked', ('apples', 'pastry crust', 'sugar', 'butter', 'cinnamon')),
+    'baby_back_ribs': (720, 48, 20, 49, 18, 1, 16, 1100, 'grilled', ('pork ribs', 'barbecue sauce')),
+    'baklava': (330, 5, 36, 20, 6, 2, 20, 160, 'baked', ('phyllo dough', 'walnuts', 'butter', 'honey syrup')),
+    'beef_carpaccio': (220, 22, 3, 13, 4, 1, 1, 450, 'raw', ('raw beef', 'olive oil', 'parmesan', 'arugula')),
+    'beef_tartare': (300, 26, 4, 20, 7, 1, 1, 600, 'raw', ('raw beef', 'egg yolk', 'capers', 'shallots')),
+    'beet_salad': (210, 6, 20, 12, 4, 5, 14, 350, 'raw', ('beets', 'goat cheese', 'walnuts', 'greens', 'vinaigrette')),
+    'beignets': (450, 7, 55, 22, 6, 1, 20, 300, 'fried', ('fried dough', 'powdered sugar')),
+    'bibimbap': (560, 24, 80, 16, 4, 6, 8, 1100, 'mixed', ('rice', 'beef', 'vegetables', 'egg', 'gochujang')),
+    'bread_pudding': (420, 9, 58, 17, 9, 1, 35, 350, 'baked', ('bread', 'eggs', 'milk', 'sugar', 'butter')),
+    'breakfast_burrito': (650, 28, 55, 35, 13, 4, 3, 1400, 'wrapped', ('tortilla', 'eggs', 'cheese', 'sausage', 'potatoes')),
+    'bruschetta': (200, 5, 26, 8, 1.5, 2, 3, 400, 'toasted', ('bread', 'tomatoes', 'olive oil', 'garlic', 'basil')),
+    'caesar_salad': (360, 10, 14, 30, 6, 3, 3, 750, 'raw', ('romaine lettuce', 'parmesan', 'croutons', 'caesar dressing')),
+    'cannoli': (370, 8, 40, 20, 8, 1, 22, 120, 'fried', ('fried pastry shell', 'ricotta', 'sugar', 'chocolate chips')),
+    'caprese_salad': (300, 15, 6, 24, 10, 1, 4, 450, 'raw', ('mozzarella', 'tomatoes', 'basil', 'olive oil')),
+    'carrot_cake': (480, 5, 60, 25, 6, 2, 42, 350, 'baked', ('carrots', 'flour', 'sugar', 'cream cheese frosting')),
+    'ceviche': (180, 24, 10, 4, 1, 2, 4, 650, 'raw', ('raw fish', 'lime juice', 'onion', 'cilantro', 'chili')),
+    'cheese_plate': (450, 25, 6, 36, 21, 1, 2, 800, 'raw', ('assorted cheese', 'crackers', 'grapes')),
+    'cheesecake': (400, 7, 32, 28, 16, 0.5, 25, 300, 'baked', ('cream cheese', 'sugar', 'eggs', 'graham cracker crust')),
+    'chicken_curry': (450, 30, 15, 30, 10, 3, 6, 900, 'simmered', ('chicken', 'curry sauce', 'onion', 'spices', 'cream')),
+    'chicken_quesadilla': (530, 30, 38, 28, 13, 2, 3, 1100, 'grilled', ('tortilla', 'chicken', 'cheese')),
+    'chicken_wings': (600, 45, 5, 44, 12, 0, 1, 1500, 'fried', ('chicken wings', 'hot sauce', 'butter')),
+    'chocolate_cake': (450, 5, 60, 22, 9, 3, 45, 380, 'baked', ('flour', 'sugar', 'cocoa', 'butter', 'chocolate frosting')),
+    'chocolate_mousse': (350, 5, 28, 25, 15, 2, 24, 60, 'chilled', ('chocolate', 'cream', 'eggs', 'sugar')),
+    'churros': (400, 5, 45, 22, 5, 2, 16, 250, 'fried', ('fried dough', 'sugar', 'cinnamon')),
+    'clam_chowder': (300, 12, 22, 18, 10, 1, 4, 950, 'simmered', ('clams', 'potatoes', 'cream', 'bacon')),
+    'club_sandwich': (600, 32, 45, 32, 9, 3, 6, 1500, 'toasted', ('bread', 'turkey', 'bacon', 'lettuce', 'tomato', 'mayonnaise')),
+    'crab_cakes': (340, 20, 14, 22, 4, 1, 2, 850, 'fried', ('crab meat', 'breadcrumbs', 'mayonnaise', 'egg')),
+    'creme_brulee': (380, 5, 30, 27, 16, 0, 28, 60, 'baked', ('cream', 'egg yolks', 'sugar', 'vanilla')),
+    'croque_madame': (650, 35, 35, 40, 20, 2, 5, 1600, 'baked', ('bread', 'ham', 'gruyere cheese', 'bechamel', 'fried egg')),
+    'cup_cakes': (320, 3, 45, 15, 6, 1, 32, 230, 'baked', ('flour', 'sugar', 'butter', 'frosting')),
+    'deviled_eggs': (200, 12, 1, 16, 4, 0, 0.5, 300, 'boiled', ('eggs', 'mayonnaise', 'mustard', 'paprika')),
+    'donuts': (300, 4, 34, 17, 8, 1, 14, 300, 'fried', ('fried dough', 'sugar glaze')),
+    'dumplings': (350, 15, 40, 14, 4, 2, 3, 800, 'steamed', ('dough wrapper', 'pork', 'cabbage', 'ginger')),
+    'edamame': (190, 17, 14, 8, 1, 8, 3, 300, 'steamed', ('soybeans', 'salt')),
+    'eggs_benedict': (700, 28, 30, 52, 24, 1, 2, 1400, 'poached', ('english muffin', 'poached eggs', 'ham', 'hollandaise sauce')),
+    'escargots': (300, 15, 4, 25, 15, 0, 0, 450, 'baked', ('snails', 'garlic butter', 'parsley')),
+    'falafel': (350, 13, 32, 19, 2.5, 7, 3, 600, 'fried', ('chickpeas', 'herbs', 'spices')),
+    'filet_mignon': (500, 45, 0, 35, 14, 0, 0, 400, 'grilled', ('beef tenderloin', 'butter', 'herbs')),
+    'fish_and_chips': (850, 35, 80, 44, 8, 6, 2, 1000, 'fried', ('battered fish', 'fried potatoes')),
+    'foie_gras': (460, 8, 4, 45, 15, 0, 2, 700, 'seared', ('duck liver', 'salt')),
+    'french_fries': (430, 5, 53, 22, 3.5, 5, 0.5, 400, 'fried', ('potatoes', 'vegetable oil', 'salt')),
+    'french_onion_soup': (400, 17, 32, 22, 12, 3, 10, 1500, 'baked', ('onions', 'beef broth', 'bread', 'gruyere cheese')),
+    'french_toast': (500, 14, 60, 22, 8, 2, 25, 550, 'fried', ('bread', 'eggs', 'milk', 'syrup', 'butter')),
+    'fried_calamari': (450, 25, 30, 25, 4, 1, 1, 900, 'fried', ('squid', 'batter', 'oil')),
+    'fried_rice': (520, 15, 70, 20, 4, 3, 3, 1200, 'fried', ('rice', 'egg', 'soy sauce', 'vegetables', 'oil')),
+    'frozen_yogurt': (220, 6, 40, 4, 2.5, 0, 34, 120, 'frozen', ('yogurt', 'sugar')),
+    'garlic_bread': (350, 8, 40, 18, 8, 2, 3, 550, 'baked', ('bread', 'butter', 'garlic')),
+    'gnocchi': (450, 11, 60, 18, 9, 3, 3, 750, 'boiled', ('potato dumplings', 'flour', 'butter sauce', 'parmesan')),
+    'greek_salad': (250, 7, 12, 20, 7, 3, 6, 700, 'raw', ('tomatoes', 'cucumber', 'feta cheese', 'olives', 'olive oil')),
+    'grilled_cheese_sandwich': (450, 17, 32, 28, 15, 1, 4, 1000, 'grilled', ('bread', 'cheese', 'butter')),
+    'grilled_salmon': (400, 40, 0, 25, 5, 0, 0, 300, 'grilled', ('salmon', 'olive oil', 'lemon')),
+    'guacamole': (230, 3, 13, 21, 3, 10, 1, 450, 'raw', ('avocado', 'lime', 'onion', 'tomato', 'cilantro')),
+    'gyoza': (300, 12, 30, 14, 4, 1, 2, 700, 'pan-fried', ('dough wrapper', 'pork', 'cabbage', 'garlic')),
+    'hamburger': (550, 30, 40, 30, 11, 2, 8, 1000, 'grilled', ('beef patty', 'bun', 'cheese', 'lettuce', 'tomato')),
+    'hot_and_sour_soup': (160, 10, 14, 7, 1.5, 1, 3, 1500, 'simmered', ('tofu', 'mushrooms', 'egg', 'vinegar', 'chicken broth')),
+    'hot_dog': (400, 14, 30, 25, 9, 1, 6, 1100, 'grilled', ('sausage', 'bun', 'mustard', 'ketchup')),
+    'huevos_rancheros': (500, 22, 40, 28, 9, 8, 5, 1100, 'fried', ('tortillas', 'fried eggs', 'salsa', 'beans', 'cheese')),
+    'hummus': (250, 8, 20, 16, 2, 6, 1, 500, 'raw', ('chickpeas', 'tahini', 'olive oil', 'lemon', 'garlic')),
+    'ice_cream': (270, 5, 31, 14, 9, 1, 28, 100, 'frozen', ('cream', 'milk', 'sugar')),
+    'lasagna': (600, 32, 45, 32, 15, 4, 9, 1300, 'baked', ('pasta', 'beef', 'tomato sauce', 'ricotta', 'mozzarella')),
+    'lobster_bisque': (350, 14, 15, 26, 15, 1, 6, 1000, 'simmered', ('lobster', 'cream', 'butter', 'brandy')),
+    'lobster_roll_sandwich': (500, 28, 40, 26, 8, 2, 5, 1100, 'toasted', ('lobster', 'bun', 'mayonnaise', 'butter')),
+    'macaroni_and_cheese': (550, 22, 55, 27, 14, 2, 6, 1000, 'baked', ('macaroni', 'cheddar cheese', 'milk', 'butter')),
+    'macarons': (280, 5, 38, 13, 4, 1, 34, 40, 'baked', ('almond flour', 'sugar', 'egg whites', 'filling')),
+    'miso_soup': (80, 6, 8, 3, 0.5, 2, 2, 900, 'simmered', ('miso', 'tofu', 'seaweed', 'dashi')),
+    'mussels': (400, 30, 15, 22, 9, 0, 1, 1000, 'steamed', ('mussels', 'white wine', 'garlic', 'butter')),
+    'nachos': (700, 22, 60, 42, 16, 7, 4, 1300, 'baked', ('tortilla chips', 'cheese', 'beans', 'sour cream', 'jalapenos')),
+    'omelette': (330, 22, 3, 25, 9, 0.5, 2, 600, 'fried', ('eggs', 'cheese', 'butter', 'vegetables')),
+    'onion_rings': (480, 6, 50, 28, 5, 3, 6, 700, 'fried', ('onions', 'batter', 'oil')),
+    'oysters': (120, 10, 7, 4, 1, 0, 0, 300, 'raw', ('oysters', 'lemon')),
+    'pad_thai': (650, 25, 85, 24, 4, 4, 20, 1500, 'stir-fried', ('rice noodles', 'shrimp', 'egg', 'peanuts', 'tamarind sauce')),
+    'paella': (550, 30, 60, 18, 4, 3, 3, 1100, 'simmered', ('rice', 'seafood', 'chicken', 'saffron', 'peas')),
+    'pancakes': (520, 12, 80, 16, 6, 2, 30, 900, 'fried', ('flour', 'eggs', 'milk', 'syrup', 'butter')),
+    'panna_cotta': (350, 4, 28, 25, 16, 0, 26, 50, 'chilled', ('cream', 'sugar', 'gelatin', 'berries')),
+    'peking_duck': (600, 32, 30, 38, 12, 1, 12, 1200, 'roasted', ('duck', 'pancakes', 'hoisin sauce', 'scallions')),
+    'pho': (450, 30, 55, 10, 3, 2, 4, 1800, 'simmered', ('rice noodles', 'beef', 'beef broth', 'herbs')),
+    'pizza': (570, 24, 64, 24, 10, 4, 6, 1300, 'baked', ('pizza dough', 'tomato sauce', 'mozzarella', 'pepperoni')),
+    'pork_chop': (450, 40, 2, 30, 10, 0, 1, 600, 'grilled', ('pork chop', 'butter', 'herbs')),
+    'poutine': (740, 20, 75, 40, 15, 6, 3, 1600, 'fried', ('french fries', 'cheese curds', 'gravy')),
+    'prime_rib': (750, 50, 0, 60, 25, 0, 0, 600, 'roasted', ('beef rib roast', 'au jus')),
+    'pulled_pork_sandwich': (600, 35, 55, 25, 8, 2, 20, 1300, 'slow-cooked', ('pulled pork', 'bun', 'barbecue sauce', 'coleslaw')),
+    'ramen': (550, 24, 65, 20, 7, 3, 4, 2000, 'simmered', ('wheat noodles', 'pork broth', 'pork', 'egg', 'scallions')),
+    'ravioli': (480, 20, 50, 22, 11, 3, 5, 950, 'boiled', ('pasta', 'cheese filling', 'tomato sauce')),
+    'red_velvet_cake': (470, 5, 60, 24, 8, 1, 45, 400, 'baked', ('flour', 'sugar', 'cocoa', 'buttermilk', 'cream cheese frosting')),
+    'risotto': (450, 12, 60, 17, 9, 2, 2, 900, 'simmered', ('arborio rice', 'parmesan', 'butter', 'broth')),
+    'samosa': (300, 5, 32, 17, 3, 3, 2, 450, 'fried', ('pastry', 'potatoes', 'peas', 'spices')),
+    'sashimi': (180, 30, 0, 6, 1.5, 0, 0, 100, 'raw', ('raw fish', 'soy sauce', 'wasabi')),
+    'scallops': (250, 25, 8, 12, 5, 0, 0, 700, 'seared', ('scallops', 'butter', 'lemon')),
+    'seaweed_salad': (100, 2, 14, 4, 0.5, 3, 8, 900, 'raw', ('seaweed', 'sesame oil', 'sesame seeds', 'vinegar')),
+    'shrimp_and_grits': (550, 30, 40, 30, 14, 2, 2, 1300, 'simmered', ('shrimp', 'grits', 'cheese', 'bacon', 'butter')),
+    'spaghetti_bolognese': (600, 28, 75, 20, 7, 6, 10, 900, 'simmered', ('spaghetti', 'ground beef', 'tomato sauce', 'parmesan')),
+    'spaghetti_carbonara': (650, 26, 70, 30, 12, 3, 3, 1100, 'boiled', ('spaghetti', 'eggs', 'pancetta', 'parmesan')),
+    'spring_rolls': (300, 6, 30, 17, 3, 2, 3, 600, 'fried', ('rice paper wrapper', 'vegetables', 'pork', 'oil')),
+    'steak': (600, 50, 0, 44, 18, 0, 0, 500, 'grilled', ('beef steak', 'salt', 'pepper')),
+    'strawberry_shortcake': (400, 5, 52, 20, 11, 2, 30, 300, 'baked', ('shortcake', 'strawberries', 'whipped cream', 'sugar')),
+    'sushi': (350, 14, 60, 5, 1, 2, 8, 1000, 'raw', ('sushi rice', 'raw fish', 'nori', 'soy sauce')),
+    'tacos': (450, 22, 38, 23, 8, 5, 3, 900, 'grilled', ('tortillas', 'beef', 'cheese', 'lettuce', 'salsa')),
+    'takoyaki': (350, 12, 40, 15, 3, 1, 6, 800, 'fried', ('batter', 'octopus', 'takoyaki sauce', 'mayonnaise')),
+    'tiramisu': (450, 7, 40, 28, 16, 1, 28, 100, 'chilled', ('mascarpone', 'ladyfingers', 'espresso', 'cocoa', 'sugar')),
+    'tuna_tartare': (250, 27, 5, 13, 2, 2, 2, 600, 'raw', ('raw tuna', 'avocado', 'soy sauce', 'sesame oil')),
+    'waffles': (450, 10, 60, 19, 5, 2, 20, 800, 'baked', ('flour', 'eggs', 'milk', 'syrup', 'butter')),
+}
+
+
+def table_analysis(food_class, confidence, model_used):
+    """
+    Build a foodAnalysis for a Food-101 class from FOOD101_NUTRITION, in the same
+    shape as Gemini's. Returns None for classes missing from the table.
+    """
+    entry = FOOD101_NUTRITION.get(food_class)
+    if entry is None:
+        return None
+    calories, protein, carbohydrates, fats, saturated_fat, fiber, sugar, sodium, preparation, ingredients = entry
+    return FoodAnalysis({
+        'foodName': ' '.join(word.capitalize() for word in food_class.split('_')),
+        'confidence': round(float(confidence), 4),
+        'calories': calories,
+        'ingredients': list(ingredients),
+        'nutritionalBreakdown': {
+            'protein': f'{protein:g}g',
+            'carbohydrates': f'{carbohydrates:g}g',
+            'fats': f'{fats:g}g',
+            'saturatedFat': f'{saturated_fat:g}g',
+            'fiber': f'{fiber:g}g',
+            'sugar': f'{sugar:g}g',
+            'sodium': f'{sodium:g}mg',
+            'vitamins': [],
+            'minerals': []
+        },
+        'foodQualityCycle': {
+            'freshness': 'Unknown',
+            'preparation': preparation,
+            'qualityIndicators': []
+        },
+        'portionSize': '1 typical serving',
+        'modelUsed': model_used,
+        'nutritionSource': 'table'
+    })
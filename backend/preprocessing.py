@@ -0,0 +1,93 @@
+import threading
+from contextlib import contextmanager
+import numpy as np
+import torch
+from PIL import Image
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+class TensorBufferPool:
+    """Reusable (1, 3, H, W) float32 input tensors, keyed by input size"""
+
+    def __init__(self, max_per_size=4):
+        self.max_per_size = max_per_size
+        self._free = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, size):
+        with self._lock:
+            free = self._free.get(size)
+            if free:
+                return free.pop()
+        return torch.empty((1, 3, size, size), dtype=torch.float32)
+
+    def release(self, size, tensor):
+        with self._lock:
+            free = self._free.setdefault(size, [])
+            if len(free) < self.max_per_size:
+                free.append(tensor)
+
+
+class ImagePreprocessor:
+    """
+    Shared preprocessing for the local backbones. The image is converted to RGB
+    once, resized once per distinct input size with a fast resampler, and
+    normalized in place into pooled tensors; (x / 255 - mean) / std is folded
+    into a single subtract and divide on the uint8 values.
+    """
+
+    def __init__(self, mean=IMAGENET_MEAN, std=IMAGENET_STD, resample=Image.BILINEAR, pool_size=4):
+        self.resample = resample
+        self.pool = TensorBufferPool(max_per_size=pool_size)
+        self._mean = torch.tensor([m * 255.0 for m in mean], dtype=torch.float32).view(1, 3, 1, 1)
+        self._std = torch.tensor([s * 255.0 for s in std], dtype=torch.float32).view(1, 3, 1, 1)
+
+    def to_rgb(self, image):
+        if isinstance(image, str):
+            image = Image.open(image)
+        elif not isinstance(image, Image.Image):
+            image = Image.fromarray(image)
+        return image if image.mode == 'RGB' else image.convert('RGB')
+
+    def resize(self, image, size):
+        if image.size == (size, size):
+            return image
+        # reducing_gap lets Pillow box-reduce large photos before the bilinear pass
+        return image.resize((size, size), self.resample, reducing_gap=2.0)
+
+    def fill(self, image, size, out):
+        """Write the normalized (1, 3, size, size) tensor for an RGB image into `out`"""
+        pixels = np.asarray(self.resize(image, size))  # (H, W, 3) uint8, read-only view
+        # Copied through a numpy view of `out`: torch.from_numpy warns on read-only arrays
+        np.copyto(out.numpy()[0], pixels.transpose(2, 0, 1))
+        out.sub_(self._mean).div_(self._std)
+        return out
+
+    def normalize_batch(self, pixels, size):
+        """
+        Normalize a (N, H, W, 3) uint8 array of images into a (N, 3, size, size)
+        float tensor, resizing on the tensor only if H/W differ from `size`.
+        """
+        batch = torch.from_numpy(pixels).permute(0, 3, 1, 2).float()
+        if batch.shape[-1] != size or batch.shape[-2] != size:
+            batch = torch.nn.functional.interpolate(batch, size=(size, size), mode='bilinear',
+                                                    align_corners=False, antialias=True)
+        return batch.sub_(self._mean).div_(self._std)
+
+    @contextmanager
+    def tensors(self, image, sizes):
+        """
+        Yield {size: normalized input tensor} for each distinct size, using pooled
+        buffers that are returned to the pool when the block exits.
+        """
+        image = self.to_rgb(image)
+        acquired = {}
+        try:
+            for size in set(sizes):
+                acquired[size] = self.fill(image, size, self.pool.acquire(size))
+            yield acquired
+        finally:
+            for size, tensor in acquired.items():
+                self.pool.release(size, tensor)
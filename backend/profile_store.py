@@ -0,0 +1,158 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from disease_rules import daily_rules_for, rules_for
+
+
+class HealthProfile:
+    """A user's body metrics and conditions with the derived values precomputed"""
+
+    __slots__ = ('profile_id', 'height', 'weight', 'diseases', 'bmi', 'bmi_category',
+                 'bmr', 'daily_calories', 'rules', 'daily_rules', 'version')
+
+    def __init__(self, profile_id, height, weight, diseases, bmi, bmi_category, bmr, daily_calories, version=0):
+        self.profile_id = profile_id
+        self.height = height
+        self.weight = weight
+        self.diseases = list(diseases)
+        self.bmi = bmi
+        self.bmi_category = bmi_category
+        self.bmr = bmr
+        self.daily_calories = daily_calories
+        # Bumped in SQLite on every update, so cached copies can tell they are stale
+        self.version = version
+        # Compiled disease rules are memoized by rules_for, so rebuilding is cheap
+        self.rules = rules_for(self.diseases)
+        self.daily_rules = daily_rules_for(self.diseases)
+
+    def to_dict(self):
+        return {
+            'profileId': self.profile_id,
+            'height': self.height,
+            'weight': self.weight,
+            'diseases': self.diseases,
+            'bmi': self.bmi,
+            'bmiCategory': self.bmi_category,
+            'bmr': self.bmr,
+            'dailyCalorieNeeds': self.daily_calories,
+        }
+
+
+class ProfileStore:
+    """
+    Bounded in-memory LRU of HealthProfiles with optional SQLite persistence.
+    Profiles evicted from memory are reloaded from SQLite on the next lookup.
+    With SQLite, every update bumps the row's version and a cached profile is
+    checked against it on each lookup, so workers sharing the database see
+    each other's updates. Without it, profiles only exist in this process.
+    """
+
+    def __init__(self, health_assessor, max_size=1024, db_path=None):
+        self.health_assessor = health_assessor
+        self.max_size = max_size
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS profiles (
+                    profile_id TEXT PRIMARY KEY,
+                    height REAL NOT NULL,
+                    weight REAL NOT NULL,
+                    diseases TEXT NOT NULL,
+                    bmi REAL,
+                    bmi_category TEXT,
+                    bmr REAL,
+                    daily_calories REAL,
+                    updated_at REAL NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 1
+                )
+            """)
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(profiles)")}
+            if 'version' not in columns:
+                self._db.execute("ALTER TABLE profiles ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+            self._db.commit()
+
+    def register(self, height, weight, diseases, profile_id=None):
+        """
+        Create a profile, or update it if `profile_id` is given. Returns the profile.
+        Raises KeyError if `profile_id` is not a known profile; new ids are always generated here.
+        """
+        profile = self.health_assessor.build_profile(
+            height, weight, diseases, profile_id=profile_id or uuid.uuid4().hex
+        )
+        with self._lock:
+            if profile_id and not self._exists(profile_id):
+                raise KeyError(profile_id)
+            if self._db is not None:
+                profile.version = self._db.execute(
+                    "INSERT INTO profiles (profile_id, height, weight, diseases, bmi, bmi_category, bmr, "
+                    "daily_calories, updated_at, version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1) "
+                    "ON CONFLICT (profile_id) DO UPDATE SET height = excluded.height, weight = excluded.weight, "
+                    "diseases = excluded.diseases, bmi = excluded.bmi, bmi_category = excluded.bmi_category, "
+                    "bmr = excluded.bmr, daily_calories = excluded.daily_calories, "
+                    "updated_at = excluded.updated_at, version = version + 1 "
+                    "RETURNING version",
+                    (profile.profile_id, profile.height, profile.weight, json.dumps(profile.diseases),
+                     profile.bmi, profile.bmi_category, profile.bmr, profile.daily_calories, time.time())
+                ).fetchone()[0]
+                self._db.commit()
+            self._remember(profile)
+        return profile
+
+    def get(self, profile_id):
+        """Return the profile for `profile_id`, or None if it is unknown"""
+        with self._lock:
+            profile = self._profiles.get(profile_id)
+            if self._db is None:
+                if profile is not None:
+                    self._profiles.move_to_end(profile_id)
+                return profile
+
+            if profile is not None:
+                # Another worker may have updated it: a primary-key read of the version only
+                row = self._db.execute("SELECT version FROM profiles WHERE profile_id = ?", (profile_id,)).fetchone()
+                if row is not None and row[0] == profile.version:
+                    self._profiles.move_to_end(profile_id)
+                    return profile
+
+            row = self._db.execute(
+                "SELECT profile_id, height, weight, diseases, bmi, bmi_category, bmr, daily_calories, version "
+                "FROM profiles WHERE profile_id = ?",
+                (profile_id,)
+            ).fetchone()
+            if row is None:
+                self._profiles.pop(profile_id, None)
+                return None
+
+            profile = HealthProfile(row[0], row[1], row[2], json.loads(row[3]), *row[4:])
+            self._remember(profile)
+            return profile
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _exists(self, profile_id):
+        if profile_id in self._profiles:
+            return True
+        if self._db is None:
+            return False
+        return self._db.execute("SELECT 1 FROM profiles WHERE profile_id = ?", (profile_id,)).fetchone() is not None
+
+    def _remember(self, profile):
+        self._profiles[profile.profile_id] = profile
+        self._profiles.move_to_end(profile.profile_id)
+        while len(self._profiles) > self.max_size:
+            self._profiles.popitem(last=False)
@@ -0,0 +1,153 @@
+import sys
+from functools import lru_cache
+
+MAX_RECOMMENDATIONS = 7
+
+# Recommendation templates. Only AVOID_JUNK and MEAL_TOO_HIGH take placeholders,
+# which are filled when the response is rendered.
+AVOID_JUNK = "🚫 AVOID THIS FOOD: {food_name} is junk food and will worsen your weight condition"
+CHOOSE_GRILLED = "💡 Choose grilled, steamed, or baked options with vegetables instead"
+MORE_ACTIVITY = "🏃 Increase physical activity to burn excess calories"
+GAIN_CALORIES = "✅ Increase caloric intake with nutrient-dense foods like nuts, avocados, and lean proteins"
+WEIGHT_GAIN_OK = "✅ This food can be part of your weight gain diet"
+GOOD_LOW_CALORIE = "✅ Good choice! Focus on similar low-calorie, nutritious meals"
+REDUCE_500 = "🎯 Target: Reduce 500 calories per day for healthy weight loss"
+LARGE_PORTION = "⚠️ This meal is a large portion of your daily calories - reduce serving size"
+CRITICAL_JUNK = "🚨 CRITICAL: This food will significantly hinder your weight loss goals"
+CALORIE_DEFICIT = "💪 Urgent: Adopt a calorie deficit diet (500-1000 cal/day reduction)"
+PRIORITIZE_WHOLE = "🥗 Prioritize: Vegetables, lean proteins, whole grains, and fruits"
+MEAL_TOO_HIGH = "❌ This {calories:g} cal meal is too high - aim for 300-400 cal per meal"
+HIGH_CALORIE_ALERT = "⚠️ HIGH CALORIE ALERT: This is >50% of your daily needs - skip or drastically reduce portion"
+BALANCE_LIGHT = "⚠️ This meal uses 40%+ of daily calories - balance with light meals"
+DIABETIC_ALERT = "🚨 DIABETIC ALERT: Junk food causes dangerous blood sugar spikes"
+HEART_RISK = "❤️ HEART RISK: High-fat processed foods increase cardiovascular risk"
+REVIEW_WARNINGS = "⚠️ HEALTH WARNINGS: Review all warnings above carefully before consuming"
+POOR_QUALITY = "❌ POOR FOOD QUALITY: Choose fresher, less processed alternatives"
+BETTER_PREPARATION = "⚠️ Consider healthier preparation methods (grilled, steamed, baked)"
+EXCELLENT_CHOICE = "✅ EXCELLENT CHOICE! This food aligns well with your health goals"
+KEEP_IT_UP = "👍 Keep making healthy choices like this to maintain your weight"
+BALANCED_DIET = "💡 Maintain a balanced diet with variety in nutrients"
+
+_TEMPLATES_WITH_PLACEHOLDERS = frozenset(sys.intern(t) for t in (AVOID_JUNK, MEAL_TOO_HIGH))
+
+
+def calorie_percentage_band(calorie_percentage):
+    """0: <=35%, 1: <=40%, 2: <=50%, 3: >50% of daily calories"""
+    if calorie_percentage > 50:
+        return 3
+    if calorie_percentage > 40:
+        return 2
+    if calorie_percentage > 35:
+        return 1
+    return 0
+
+
+def meal_calorie_band(calories):
+    """0: <=400 cal, 1: <500 cal, 2: >=500 cal"""
+    if calories >= 500:
+        return 2
+    if calories > 400:
+        return 1
+    return 0
+
+
+def quality_band(health_score):
+    """0: <4, 1: <6, 2: <7, 3: >=7"""
+    if health_score < 4:
+        return 0
+    if health_score < 6:
+        return 1
+    if health_score < 7:
+        return 2
+    return 3
+
+
+@lru_cache(maxsize=1024)
+def disease_alerts(diseases):
+    """
+    Junk-food alerts for a tuple of user-entered conditions, in the order the user
+    listed them. Capped at MAX_RECOMMENDATIONS, since no more could be shown, which
+    keeps the alert tuples (and so recommendation_templates' cache) finite.
+    """
+    alerts = []
+    for disease in diseases:
+        lowered = disease.lower()
+        if 'diabetes' in lowered:
+            alerts.append(DIABETIC_ALERT)
+        if 'heart' in lowered:
+            alerts.append(HEART_RISK)
+    return tuple(alerts[:MAX_RECOMMENDATIONS])
+
+
+@lru_cache(maxsize=None)
+def recommendation_templates(bmi_category, is_junk, percentage_band, calorie_band,
+                             alerts, has_warnings, suitable, score_band):
+    """
+    Decision table from discretized features to an interned tuple of templates.
+    The feature space is small and finite, so every combination is built once.
+    alerts: disease_alerts() for the user's conditions (at most MAX_RECOMMENDATIONS
+            of two templates)
+    """
+    templates = []
+
+    # Strong warnings for junk food + obesity/overweight
+    if bmi_category in ('Overweight', 'Obese') and is_junk:
+        templates += [AVOID_JUNK, CHOOSE_GRILLED, MORE_ACTIVITY]
+
+    # BMI-based recommendations
+    if bmi_category == 'Underweight':
+        templates.append(GAIN_CALORIES)
+        if not is_junk:
+            templates.append(WEIGHT_GAIN_OK)
+    elif bmi_category == 'Overweight':
+        if not is_junk and calorie_band < 2:
+            templates.append(GOOD_LOW_CALORIE)
+        templates.append(REDUCE_500)
+        if percentage_band >= 1:
+            templates.append(LARGE_PORTION)
+    elif bmi_category == 'Obese':
+        if is_junk:
+            templates.append(CRITICAL_JUNK)
+        templates += [CALORIE_DEFICIT, PRIORITIZE_WHOLE]
+        if calorie_band >= 1:
+            templates.append(MEAL_TOO_HIGH)
+
+    # Calorie-based recommendations
+    if percentage_band == 3:
+        templates.append(HIGH_CALORIE_ALERT)
+    elif percentage_band == 2:
+        templates.append(BALANCE_LIGHT)
+
+    # Disease-specific urgent recommendations
+    if is_junk:
+        templates += alerts
+
+    # Warnings from suitability check
+    if has_warnings:
+        templates.append(REVIEW_WARNINGS)
+
+    # Food quality recommendations
+    if score_band == 0:
+        templates.append(POOR_QUALITY)
+    elif score_band == 1:
+        templates.append(BETTER_PREPARATION)
+
+    # Positive reinforcement for good choices
+    if not is_junk and suitable and score_band == 3:
+        templates.append(EXCELLENT_CHOICE)
+        if bmi_category == 'Normal weight':
+            templates.append(KEEP_IT_UP)
+
+    # Always provide an actionable tip
+    if not templates:
+        templates.append(BALANCED_DIET)
+
+    return tuple(sys.intern(t) for t in templates[:MAX_RECOMMENDATIONS])
+
+
+def render_recommendations(templates, food_name, calories):
+    """Fill placeholders for the response; templates without any are passed through"""
+    return [
+        t.format(food_name=food_name, calories=calories) if t in _TEMPLATES_WITH_PLACEHOLDERS else t
+        for t in templates
+    ]
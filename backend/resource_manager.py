@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import torch
+
+
+def available_cores():
+    """CPU cores this process may run on (respects container / affinity limits)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class InferenceResources:
+    """
+    Owns PyTorch's CPU thread settings and bounds concurrent forward passes so
+    that request threads x intra-op threads never exceeds the cores available.
+
+    intra_op_threads: threads used inside one forward pass
+    inter_op_threads: threads for running independent ops in parallel
+    max_concurrent:   forward passes allowed at once (default cores // intra_op_threads)
+    use_pool:         run forwards on a dedicated executor of max_concurrent threads
+                      while request threads wait on I/O
+    """
+
+    def __init__(self, intra_op_threads=None, inter_op_threads=None, max_concurrent=None, use_pool=False):
+        cores = available_cores()
+        self.cores = cores
+        self.intra_op_threads = max(1, intra_op_threads or cores)
+        self.inter_op_threads = max(1, inter_op_threads or 1)
+        self.max_concurrent = max(1, max_concurrent or cores // self.intra_op_threads)
+        self.use_pool = use_pool
+
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrent)
+        self._pool = None
+        self._waiting = 0
+        self._active = 0
+        self._counter_lock = threading.Lock()
+        self._apply_thread_settings()
+
+        if use_pool:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_concurrent,
+                thread_name_prefix='inference',
+                initializer=torch.set_num_threads,
+                initargs=(self.intra_op_threads,)
+            )
+
+    @classmethod
+    def from_env(cls):
+        """Build from TORCH_INTRA_OP_THREADS, TORCH_INTER_OP_THREADS, INFERENCE_CONCURRENCY, INFERENCE_POOL"""
+        def env_int(name):
+            value = os.getenv(name)
+            return int(value) if value else None
+
+        return cls(
+            intra_op_threads=env_int('TORCH_INTRA_OP_THREADS'),
+            inter_op_threads=env_int('TORCH_INTER_OP_THREADS'),
+            max_concurrent=env_int('INFERENCE_CONCURRENCY'),
+            use_pool=os.getenv('INFERENCE_POOL', 'false').lower() in ('1', 'true', 'yes')
+        )
+
+    def _apply_thread_settings(self):
+        global _interop_threads_set
+        torch.set_num_threads(self.intra_op_threads)
+        # Can only be set once per process, before any inter-op parallel work; a second
+        # call aborts the interpreter in some torch versions rather than raising
+        with _interop_threads_lock:
+            if _interop_threads_set or torch.get_num_interop_threads() == self.inter_op_threads:
+                return
+            _interop_threads_set = True
+        try:
+            torch.set_num_interop_threads(self.inter_op_threads)
+        except RuntimeError:
+            pass
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the max_concurrent forward-pass slots"""
+        with self._counter_lock:
+            self._waiting += 1
+        self._semaphore.acquire()
+        with self._counter_lock:
+            self._waiting -= 1
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._counter_lock:
+                self._active -= 1
+            self._semaphore.release()
+
+    def run(self, fn, *args, **kwargs):
+        """Run a CPU-heavy call within the concurrency limit (on the inference pool if enabled)"""
+        if self._pool is not None:
+            def task():
+                with self.slot():
+                    return fn(*args, **kwargs)
+            return self._pool.submit(task).result()
+        with self.slot():
+            return fn(*args, **kwargs)
+
+    def describe(self):
+        with self._counter_lock:
+            waiting, active = self._waiting, self._active
+        return {
+            'cores': self.cores,
+            'intraOpThreads': self.intra_op_threads,
+            'interOpThreads': self.inter_op_threads,
+            'maxConcurrent': self.max_concurrent,
+            'pool': self.use_pool,
+            'active': active,
+            'waiting': waiting,
+        }
+
+
+_resources = None
+_resources_lock = threading.Lock()
+_interop_threads_set = False
+_interop_threads_lock = threading.Lock()
+
+
+def get_resources():
+    """Process-wide InferenceResources, configured from the environment on first use"""
+    global _resources
+    with _resources_lock:
+        if _resources is None:
+            _resources = InferenceResources.from_env()
+        return _resources
+
+
+def candidate_splits(cores):
+    """(intra_op_threads, max_concurrent) splits that use all cores without oversubscribing"""
+    splits = []
+    intra = 1
+    while intra <= cores:
+        splits.append((intra, max(1, cores // intra)))
+        intra *= 2
+    if (cores, 1) not in splits:
+        splits.append((cores, 1))
+    return splits
+
+
+def autotune(workload, requests=24, client_threads=None, splits=None):
+    """
+    Benchmark `workload()` (one forward pass) under each thread split and return
+    results sorted by throughput, best first. `client_threads` simulates that many
+    concurrent request threads; the oversubscribed default (every request thread
+    using all cores) is included for comparison.
+    """
+    cores = available_cores()
+    client_threads = client_threads or max(2, cores)
+    splits = list(splits or candidate_splits(cores))
+    baseline = ('oversubscribed', cores, client_threads)
+
+    results = []
+    for label, intra, concurrency in [baseline] + [('split', i, c) for i, c in splits]:
+        torch.set_num_threads(intra)
+        semaphore = threading.BoundedSemaphore(concurrency)
+        latencies = []
+        latency_lock = threading.Lock()
+
+        def one_request():
+            start = time.perf_counter()
+            with semaphore:
+                workload()
+            elapsed = time.perf_counter() - start
+            with latency_lock:
+                latencies.append(elapsed)
+
+        workload()  # warm up at this thread count
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=client_threads, initializer=torch.set_num_threads,
+                                initargs=(intra,)) as executor:
+            list(executor.map(lambda _: one_request(), range(requests)))
+        total = time.perf_counter() - started
+
+        latencies.sort()
+        results.append({
+            'mode': label,
+            'intraOpThreads': intra,
+            'maxConcurrent': concurrency,
+            'throughput': round(requests / total, 3),
+            'p50Ms': round(latencies[len(latencies) // 2] * 1000, 1),
+            'p95Ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+        })
+
+    results.sort(key=lambda r: r['throughput'], reverse=True)
+    return results
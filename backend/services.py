@@ -0,0 +1,107 @@
+import threading
+from health_assessor import HealthAssessor
+from load_shedder import LoadShedder, queue_thresholds_for
+from profile_store import ProfileStore
+
+
+class Services:
+    """
+    The long-lived objects behind the API, each built on first use from the
+    app config. Constructing FoodAnalyzer pulls in google-generativeai and,
+    unless INFERENCE_SOCKET is set, torch and the local models, so a process
+    that only answers /api/health never pays for them.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._lock = threading.RLock()
+        self._food_analyzer = None
+        self._health_assessor = None
+        self._profile_store = None
+        self._meal_log = None
+        # Cheap and needed from the first request, so built eagerly
+        self.load_shedder = LoadShedder(
+            queue_thresholds=config['LOAD_SHED_QUEUE'] or queue_thresholds_for(config['WEB_THREADS']),
+            p95_thresholds_ms=config['LOAD_SHED_P95_MS'],
+            recovery_ratio=config['LOAD_SHED_RECOVERY'],
+            min_dwell_s=config['LOAD_SHED_DWELL_S'],
+            window_s=config['LOAD_SHED_WINDOW_S'],
+            retry_after_s=config['LOAD_SHED_RETRY_AFTER_S'],
+            enabled=config['LOAD_SHEDDING']
+        )
+
+    @property
+    def food_analyzer(self):
+        if self._food_analyzer is None:
+            with self._lock:
+                if self._food_analyzer is None:
+                    from food_analyzer import FoodAnalyzer
+                    self._food_analyzer = FoodAnalyzer(
+                        self.config['GEMINI_API_KEY'],
+                        confidence_threshold=self.config['MODEL_CONFIDENCE_THRESHOLD'],
+                        embedding_index_size=self.config['EMBEDDING_INDEX_SIZE'],
+                        embedding_index_dir=self.config['EMBEDDING_INDEX_DIR'],
+                        similarity_threshold=self.config['EMBEDDING_SIMILARITY_THRESHOLD'],
+                        inference_socket=self.config['INFERENCE_SOCKET'],
+                        inference_timeout=self.config['INFERENCE_TIMEOUT'],
+                        fast_model=self.config['FAST_MODEL']
+                    )
+        return self._food_analyzer
+
+    @property
+    def health_assessor(self):
+        if self._health_assessor is None:
+            with self._lock:
+                if self._health_assessor is None:
+                    self._health_assessor = HealthAssessor()
+        return self._health_assessor
+
+    @property
+    def profile_store(self):
+        if self._profile_store is None:
+            with self._lock:
+                if self._profile_store is None:
+                    self._profile_store = ProfileStore(
+                        self.health_assessor,
+                        max_size=self.config['PROFILE_CACHE_SIZE'],
+                        db_path=self.config['PROFILE_DB_PATH']
+                    )
+        return self._profile_store
+
+    @property
+    def meal_log(self):
+        if self._meal_log is None:
+            with self._lock:
+                if self._meal_log is None:
+                    from meal_log import MealLog
+                    self._meal_log = MealLog(self.config['MEAL_LOG_DB_PATH'])
+        return self._meal_log
+
+    def loaded(self):
+        """Names of the services built so far"""
+        return [name for name, service in (('foodAnalyzer', self._food_analyzer),
+                                           ('healthAssessor', self._health_assessor),
+                                           ('profileStore', self._profile_store),
+                                           ('mealLog', self._meal_log))
+                if service is not None]
+
+    def warm_up(self):
+        """Build everything now and load the local models, instead of on the first request"""
+        predictor = self.food_analyzer.local_predictor
+        for model_type in getattr(predictor, 'MODEL_TYPES', ()):
+            predictor.load_model(model_type)
+        self.profile_store  # also builds the health assessor
+
+    def shutdown(self):
+        """Release sockets, shared memory and database handles held by built services"""
+        with self._lock:
+            food_analyzer = self._food_analyzer
+            if food_analyzer is not None:
+                if food_analyzer.embedding_index is not None:
+                    food_analyzer.embedding_index.flush()
+                if hasattr(food_analyzer.local_predictor, 'close'):
+                    food_analyzer.local_predictor.close()
+            if self._profile_store is not None:
+                self._profile_store.close()
+            if self._meal_log is not None:
+                self._meal_log.close()
@@ -0,0 +1,141 @@
+import itertools
+import json
+
+import pytest
+
+import disease_rules
+from disease_rules import DISEASE_RULES, load_rule_file, rules_for
+from health_assessor import HealthAssessor
+from nutrition import NutritionRecord
+
+
+def baseline_rule_checks(diseases, nutrition, is_unhealthy, penalty_applied, warnings):
+    """The disease and general nutrient checks as they were written before the rule table"""
+    score = 0
+    calories = nutrition.calories
+    sodium_value, sugar_value = nutrition.sodium, nutrition.sugar
+    fat_value, saturated_fat = nutrition.fats, nutrition.saturated_fat
+
+    for disease_lower in (d.lower() for d in diseases):
+        if 'diabetes' in disease_lower:
+            if sugar_value > 20:
+                score -= 2.5
+                warnings.append(f"❌ High sugar content ({sugar_value:g}g) - Dangerous for diabetes")
+            elif sugar_value > 15:
+                score -= 1
+                warnings.append(f"⚠️ Moderate sugar content ({sugar_value:g}g) - Monitor intake")
+            if is_unhealthy and not penalty_applied:
+                score -= 1.5
+                warnings.append("❌ Processed foods can spike blood sugar levels")
+        if 'hypertension' in disease_lower:
+            if sodium_value > 800:
+                score -= 2.5
+                warnings.append(f"❌ Very high sodium ({sodium_value:g}mg) - Dangerous for hypertension")
+            elif sodium_value > 500:
+                score -= 1.5
+                warnings.append(f"⚠️ High sodium ({sodium_value:g}mg) - Monitor intake")
+        if 'heart' in disease_lower:
+            if fat_value > 25 or saturated_fat > 12:
+                score -= 2.5
+                warnings.append("❌ High fat content - Not suitable for heart conditions")
+            elif fat_value > 20 or saturated_fat > 10:
+                score -= 1
+                warnings.append("⚠️ Moderate fat content - Monitor intake")
+            if is_unhealthy and not penalty_applied:
+                score -= 1.5
+                warnings.append("❌ Processed foods increase cardiovascular risk")
+        if 'obesity' in disease_lower:
+            if is_unhealthy and not penalty_applied:
+                score -= 2.5
+                warnings.append("❌ STRONGLY NOT RECOMMENDED - Junk food will worsen obesity")
+            elif is_unhealthy:
+                warnings.append("❌ STRONGLY NOT RECOMMENDED - Junk food will worsen obesity")
+            if calories > 600:
+                score -= 1.5
+                warnings.append(f"❌ High calorie meal ({calories:g} cal) - Choose lower calorie options")
+
+    if sodium_value > 1000 and not any('sodium' in w.lower() for w in warnings):
+        score -= 1.5
+        warnings.append(f"⚠️ Extremely high sodium ({sodium_value:g}mg) - Daily limit is 2300mg")
+    if sugar_value > 30 and not any('sugar' in w.lower() for w in warnings):
+        score -= 1.5
+        warnings.append(f"⚠️ Very high sugar content ({sugar_value:g}g) - Limit sugar intake")
+    if fat_value > 35 and not any('fat' in w.lower() for w in warnings):
+        score -= 0.5
+        warnings.append(f"⚠️ High fat content ({fat_value:g}g)")
+    return -score
+
+
+CONDITIONS = ['diabetes', 'hypertension', 'heart disease', 'obesity', 'kidney disease']
+CONDITION_SETS = [list(c) for n in range(3) for c in itertools.combinations(CONDITIONS, n)]
+NUTRIENTS = [
+    NutritionRecord(calories=c, sugar=s, sodium=na, fats=f, saturated_fat=sf)
+    for c, s, na, f, sf in itertools.product((300, 650), (10, 18, 35), (400, 600, 1200), (15, 22, 40), (5, 11, 13))
+]
+
+
+@pytest.mark.parametrize('diseases', CONDITION_SETS, ids=lambda d: '+'.join(d) or 'none')
+def test_rule_set_matches_baseline(diseases):
+    rules = rules_for(diseases)
+    for nutrition, is_unhealthy, penalty_applied in itertools.product(NUTRIENTS, (False, True), (False, True)):
+        expected_warnings, warnings = [], []
+        expected_penalty = baseline_rule_checks(diseases, nutrition, is_unhealthy, penalty_applied,
+                                                expected_warnings)
+        penalty = rules.evaluate(nutrition, is_unhealthy, penalty_applied, warnings)
+        assert penalty == pytest.approx(expected_penalty)
+        # Conditions are applied in table order rather than the order the user typed them
+        assert sorted(warnings) == sorted(expected_warnings)
+
+
+def test_aliases_and_case_share_one_rule_set():
+    assert rules_for(['Type 2 Diabetes', ' high  blood pressure']) is rules_for(['hypertension', 'diabetes'])
+    assert rules_for(['unknown condition']) is rules_for([])
+
+
+def test_suitability_score_is_clamped():
+    nutrition = NutritionRecord(calories=900, sugar=60, sodium=2000, fats=50, saturated_fat=20)
+    food = {'foodName': 'Fried chicken burger', 'ingredients': ['bacon']}
+    result = HealthAssessor().assess_food_suitability(CONDITIONS, food, 'Obese', nutrition)
+    assert result['suitabilityScore'] == 0
+    assert result['suitable'] is False
+    assert result['isJunkFood'] is True
+
+
+def test_load_rule_file_adds_conditions(tmp_path, monkeypatch):
+    monkeypatch.setattr(disease_rules, 'DISEASE_RULES', dict(DISEASE_RULES))
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({'gout': {
+        'aliases': ['gouty arthritis'],
+        'restrictions': ['purines'],
+        'rules': [{'tiers': [{'above': {'protein': 30}, 'penalty': 1, 'message': "⚠️ Protein {protein:g}g"}]}],
+    }}), encoding='utf-8')
+    try:
+        load_rule_file(str(path))
+        warnings = []
+        assert rules_for(['gouty arthritis']).evaluate(NutritionRecord(protein=40), False, False, warnings) == 1
+        assert warnings == ["⚠️ Protein 40g"]
+    finally:
+        monkeypatch.undo()
+        clear_rule_caches()
+
+
+def clear_rule_caches():
+    disease_rules._alias_table.cache_clear()
+    disease_rules.profile_key.cache_clear()
+    disease_rules.compile_rules.cache_clear()
+    disease_rules.compile_daily_rules.cache_clear()
+
+
+def test_rules_file_is_loaded_from_app_config(tmp_path, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setattr(disease_rules, 'DISEASE_RULES', dict(DISEASE_RULES))
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({'gout': {'aliases': [], 'restrictions': ['purines'], 'rules': []}}),
+                    encoding='utf-8')
+    try:
+        app_module.create_app({'DISEASE_RULES_FILE': str(path), 'UPLOAD_FOLDER': str(tmp_path / 'uploads')})
+        assert 'gout' in disease_rules.DISEASE_RULES
+    finally:
+        monkeypatch.undo()
+        clear_rule_caches()
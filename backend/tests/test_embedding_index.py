@@ -0,0 +1,87 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from embedding_index import EmbeddingIndex
+
+
+def unit(*values):
+    return np.array(values, dtype=np.float32)
+
+
+@pytest.fixture(params=['memory', 'disk'])
+def make_index(request, tmp_path):
+    def make(**kwargs):
+        path = str(tmp_path / 'index') if request.param == 'disk' else None
+        return EmbeddingIndex(3, path=path, **kwargs)
+    return make
+
+
+def test_insert_and_search(make_index):
+    index = make_index(capacity=4, threshold=0.9)
+    assert index.search(unit(1, 0, 0)) == (None, 0.0)
+
+    index.insert(unit(1, 0, 0), {'foodName': 'Pizza'})
+    index.insert(unit(0, 2, 0), {'foodName': 'Salad'})
+    assert len(index) == 2
+
+    analysis, similarity = index.search(unit(0, 1, 0.1))
+    assert analysis == {'foodName': 'Salad'}
+    assert similarity > 0.99
+    analysis, similarity = index.search(unit(1, 1, 0))
+    assert analysis is None
+    assert similarity == pytest.approx(0.7071, abs=1e-3)
+
+
+def test_full_index_evicts_least_recently_hit(make_index):
+    index = make_index(capacity=2, threshold=0.9)
+    index.insert(unit(1, 0, 0), {'foodName': 'Pizza'})
+    index.insert(unit(0, 1, 0), {'foodName': 'Salad'})
+    assert index.search(unit(1, 0, 0))[0] == {'foodName': 'Pizza'}  # Salad is now the oldest hit
+
+    index.insert(unit(0, 0, 1), {'foodName': 'Soup'})
+    assert len(index) == 2
+    assert index.search(unit(0, 1, 0))[0] is None
+    assert index.search(unit(1, 0, 0))[0] == {'foodName': 'Pizza'}
+    assert index.search(unit(0, 0, 1))[0] == {'foodName': 'Soup'}
+
+
+def test_reopens_from_disk_and_drops_evicted_rows(tmp_path):
+    path = str(tmp_path / 'index')
+    index = EmbeddingIndex(3, capacity=2, path=path, flush_every=1)
+    for i in range(3):
+        index.insert(unit(1, i, 0), {'n': i})
+
+    reopened = EmbeddingIndex(3, capacity=2, path=path)
+    assert len(reopened) == 2
+    assert reopened.search(unit(1, 2, 0))[0] == {'n': 2}
+    assert reopened._db.execute("SELECT COUNT(*) FROM analyses").fetchone()[0] == 2
+
+    # A different dimension or capacity starts over
+    assert len(EmbeddingIndex(3, capacity=5, path=path)) == 0
+
+
+def insert_many(path, worker, count):
+    index = EmbeddingIndex(3, capacity=1000, path=path)
+    for i in range(count):
+        index.insert(unit(worker + 1, i + 1, 0), {'worker': worker, 'i': i})
+    index.flush()
+
+
+def test_processes_sharing_a_directory_get_distinct_slots(tmp_path):
+    path = str(tmp_path / 'index')
+    EmbeddingIndex(3, capacity=1000, path=path)
+    workers = [multiprocessing.get_context('fork').Process(target=insert_many, args=(path, w, 50))
+               for w in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    index = EmbeddingIndex(3, capacity=1000, path=path)
+    assert len(index) == 150
+    ids = index._ids[:150]
+    assert len(set(ids.tolist())) == 150
+    assert index._db.execute("SELECT COUNT(*) FROM analyses").fetchone()[0] == 150
@@ -0,0 +1,133 @@
+import json
+
+import pytest
+from PIL import Image
+
+ANALYSIS = {
+    'foodName': 'Pizza', 'confidence': 0.9, 'calories': 285, 'ingredients': ['cheese'],
+    'nutritionalBreakdown': {'protein': '12g', 'fats': '10g'}, 'foodQualityCycle': {'healthScore': 3},
+}
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGemini:
+    """Answers the food-name prompt, then the detailed-analysis prompt"""
+
+    def __init__(self):
+        self.images = []
+
+    def generate_content(self, contents, generation_config=None):
+        self.images.append(contents[1])
+        return FakeResponse('Pizza' if len(self.images) % 2 else json.dumps(ANALYSIS))
+
+
+@pytest.fixture
+def analyzer():
+    from food_analyzer import FoodAnalyzer
+
+    analyzer = FoodAnalyzer('test-key', use_local_models=False, embedding_index_size=0)
+    analyzer.model = FakeGemini()
+    return analyzer
+
+
+def test_gemini_gets_the_full_resolution_image(analyzer):
+    reduced, full = Image.new('RGB', (64, 48)), Image.new('RGB', (512, 384))
+    calls = []
+
+    def full_image():
+        calls.append(1)
+        return full
+
+    analysis = analyzer.analyze_food_image(reduced, full_image=full_image)
+    assert analysis['foodName'] == 'Pizza'
+    assert analysis['modelUsed'] == 'Gemini API'
+    assert analyzer.model.images == [full, full]
+    assert calls == [1]
+
+
+class FakePredictor:
+    """Local predictor that always sees a pizza; records which models were asked for"""
+    MODEL_TYPES = ('convnext', 'efficientnet', 'vit')
+    embedding_model = 'convnext'
+    class_names = ['pizza']
+
+    def __init__(self):
+        self.requested = []
+
+    def predict_ensemble(self, image, model_types=None):
+        self.requested.append(model_types)
+        predictions = [{'food_name': 'pizza', 'confidence': 0.9, 'model': m,
+                        'embedding': [1.0, 0.0, 0.0] if m == self.embedding_model else None}
+                       for m in model_types or self.MODEL_TYPES]
+        return 'pizza', 0.9, predictions[0]['model'], predictions
+
+
+@pytest.fixture
+def degraded_analyzer():
+    from food_analyzer import FoodAnalyzer
+
+    analyzer = FoodAnalyzer('test-key', use_local_models=False)
+    analyzer.model = FakeGemini()
+    analyzer.use_local_models = True
+    analyzer.local_predictor = FakePredictor()
+    analyzer.fast_model = analyzer.local_predictor.embedding_model
+    return analyzer
+
+
+def test_fast_model_defaults_to_the_embedding_model(analyzer):
+    assert analyzer.fast_model is None  # no local models
+    from food_analyzer import FoodAnalyzer
+    assert FoodAnalyzer('test-key', use_local_models=False, fast_model='vit').fast_model == 'vit'
+
+
+def test_degraded_tiers_keep_similar_image_reuse(degraded_analyzer):
+    from load_shedder import TIER_LOCAL_ONLY, TIER_SINGLE_BACKBONE
+
+    image = Image.new('RGB', (32, 32))
+    analysis = degraded_analyzer.analyze_food_image(image, tier=TIER_SINGLE_BACKBONE)
+    assert analysis['modelUsed'] == 'CONVNEXT'
+    assert degraded_analyzer.local_predictor.requested == [['convnext']]
+    assert len(degraded_analyzer.embedding_index) == 1
+
+    # The same image under heavier load is answered from the index, not the table
+    reused = degraded_analyzer.analyze_food_image(image, tier=TIER_LOCAL_ONLY)
+    assert reused['cacheSimilarity'] == pytest.approx(1.0)
+    assert reused.get('nutritionSource') != 'table'
+    assert len(degraded_analyzer.model.images) == 2
+
+
+def test_local_only_without_local_models_is_overloaded(analyzer):
+    from load_shedder import TIER_LOCAL_ONLY, ServiceOverloaded
+
+    with pytest.raises(ServiceOverloaded) as overloaded:
+        analyzer.analyze_food_image(Image.new('RGB', (32, 32)), tier=TIER_LOCAL_ONLY)
+    assert overloaded.value.tier == TIER_LOCAL_ONLY
+    assert analyzer.model.images == []
+
+
+def test_local_only_answers_from_the_nutrition_table(degraded_analyzer):
+    from load_shedder import TIER_LOCAL_ONLY
+
+    analysis = degraded_analyzer.analyze_food_image(Image.new('RGB', (32, 32)), tier=TIER_LOCAL_ONLY)
+    assert analysis['foodName'] == 'Pizza'
+    assert analysis['nutritionSource'] == 'table'
+    assert degraded_analyzer.local_predictor.requested == [['convnext']]
+    assert degraded_analyzer.model.images == []
+
+
+def test_analysis_without_optional_fields_is_not_requeried(analyzer, monkeypatch):
+    from health_assessor import HealthAssessor
+
+    minimal = {'foodName': 'Pizza', 'calories': 285, 'nutritionalBreakdown': {'fats': '10g'}}
+    monkeypatch.setitem(globals(), 'ANALYSIS', minimal)
+    analysis = analyzer.analyze_food_image(Image.new('RGB', (32, 32)))
+    assert analysis['foodName'] == 'Pizza'
+    assert len(analyzer.model.images) == 2
+    assert analyzer.analysis_parser.stats()['requeried'] == 0
+
+    assessment = HealthAssessor().assess_health(180, 80, [], analysis)
+    assert 'error' not in assessment
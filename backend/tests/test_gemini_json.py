@@ -0,0 +1,63 @@
+import pytest
+
+from gemini_json import (
+    ANALYSIS_SCHEMA, RECOMMENDATIONS_SCHEMA, GeminiJSONParser, JSONRepairError, extract_json_value
+)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('{"a": 1}', {'a': 1}),
+    ('```json\n{"a": 1}\n```', {'a': 1}),
+    ('```\n["x", "y"]\n```', ['x', 'y']),
+    # ``` inside a value is not a fence
+    ('```json\n{"a": "use ``` for code"}\n```', {'a': 'use ``` for code'}),
+    ('{"a": "use ``` for code"}', {'a': 'use ``` for code'}),
+    ('Here you go:\n{"a": [1, 2]}\nEnjoy!', {'a': [1, 2]}),
+    ('{"a": 1, "b": [1, 2,],}', {'a': 1, 'b': [1, 2]}),
+    ('{"protein": 12g, "sodium": 850 mg}', {'protein': '12g', 'sodium': '850 mg'}),
+    ('{"a": True, "b": None, "c": [False]}', {'a': True, 'b': None, 'c': [False]}),
+    ('{"a": [1, 2', {'a': [1, 2]}),
+    ('{"a": "trunc', {'a': 'trunc'}),
+    # Curly quotes as delimiters are straightened...
+    ('{“a”: “b”, “c”: [“d”]}', {'a': 'b', 'c': ['d']}),
+    ('{\n  “a”: 1\n}', {'a': 1}),
+    # ...but curly quotes inside values are kept
+    ('{"foodName": "Chef’s “special” pizza", "calories": 500,}', {'foodName': 'Chef’s “special” pizza', 'calories': 500}),
+    ('{“foodName”: “Chef’s “special” pizza”}', {'foodName': 'Chef’s “special” pizza'}),
+])
+def test_parse_repairs(text, expected):
+    assert GeminiJSONParser().parse(text) == expected
+
+
+def test_extract_ignores_brackets_in_strings():
+    assert extract_json_value('x {"a": "}]"} y') == '{"a": "}]"}'
+
+
+def test_counts_clean_repaired_and_failed():
+    parser = GeminiJSONParser(RECOMMENDATIONS_SCHEMA)
+    parser.parse('["a"]')
+    parser.parse('```json\n["a",]\n```')
+    with pytest.raises(JSONRepairError):
+        parser.parse('no json here')
+    with pytest.raises(JSONRepairError):
+        parser.parse('[1, 2]')
+    parser.record_requery()
+
+    stats = parser.stats()
+    assert (stats['total'], stats['clean'], stats['repaired'], stats['failed'], stats['requeried']) == (4, 1, 1, 2, 1)
+    assert stats['repairRate'] == 0.25
+
+
+def test_analysis_schema():
+    parser = GeminiJSONParser(ANALYSIS_SCHEMA)
+    analysis = {'foodName': 'Pizza', 'confidence': 0.9, 'calories': '285 kcal', 'ingredients': ['cheese'],
+                'nutritionalBreakdown': {}, 'foodQualityCycle': {}}
+    assert parser.parse(str(analysis).replace("'", '"')) == analysis
+    # Optional fields may be left out without counting as a failure (and a re-query)
+    assert parser.parse('{"foodName": "Pizza", "calories": 285, "nutritionalBreakdown": {}}')['calories'] == 285
+    assert parser.stats()['failed'] == 0
+    with pytest.raises(JSONRepairError, match='Missing required field: nutritionalBreakdown'):
+        parser.parse('{"foodName": "Pizza", "confidence": 0.9, "calories": 285, "foodQualityCycle": {}}')
+    with pytest.raises(JSONRepairError, match='expected number'):
+        parser.parse('{"foodName": "Pizza", "confidence": true, "calories": 285, "ingredients": [], '
+                     '"nutritionalBreakdown": {}, "foodQualityCycle": {}}')
@@ -0,0 +1,102 @@
+import threading
+
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+
+from inference_client import InferenceClient
+from inference_server import InferenceServer
+from model_predictor import LocalModelPredictor
+
+
+class TinyPredictor(LocalModelPredictor):
+    """LocalModelPredictor with small random backbones instead of the trained checkpoints"""
+
+    def __init__(self):
+        super().__init__(input_sizes={model_type: 16 for model_type in self.MODEL_TYPES})
+
+    def load_model(self, model_type):
+        if model_type not in self.models:
+            torch.manual_seed(self.MODEL_TYPES.index(model_type))
+            model = torch.nn.Sequential(
+                torch.nn.AdaptiveAvgPool2d(4), torch.nn.Flatten(),
+                torch.nn.Linear(48, 8), torch.nn.Linear(8, len(self.class_names))
+            ).eval()
+            model[-1].register_forward_pre_hook(self._capture_embedding)
+            self.models[model_type] = model
+        return self.models[model_type]
+
+
+@pytest.fixture
+def server_and_client(tmp_path):
+    predictor = TinyPredictor()
+    server = InferenceServer(str(tmp_path / 'inference.sock'), predictor, max_batch=4, max_wait_ms=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = InferenceClient(str(tmp_path / 'inference.sock'), pool_size=2)
+    yield predictor, client
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_round_trip_matches_local_prediction(server_and_client):
+    predictor, client = server_and_client
+    assert client.class_names == predictor.class_names
+    assert client.embedding_model == predictor.embedding_model
+
+    rng = np.random.default_rng(37)
+    image = Image.fromarray(rng.integers(0, 256, (16, 16, 3), dtype=np.uint8))
+    expected = predictor.predict_ensemble(image)
+    name, confidence, model, predictions = client.predict_ensemble(image)
+
+    assert (name, model) == expected[:1] + expected[2:3]
+    assert confidence == pytest.approx(expected[1], abs=1e-5)
+    assert [p['model'] for p in predictions] == [p['model'] for p in expected[3]]
+    embedding = next(p['embedding'] for p in predictions if p['model'] == predictor.embedding_model)
+    expected_embedding = next(p['embedding'] for p in expected[3] if p['model'] == predictor.embedding_model)
+    np.testing.assert_allclose(embedding, expected_embedding, atol=1e-5)
+
+
+def test_model_mask_limits_the_models_run(server_and_client):
+    predictor, client = server_and_client
+    image = Image.new('RGB', (40, 24), (10, 120, 200))  # resized to the server's side by the client
+
+    _, _, model, predictions = client.predict_ensemble(image, model_types=[predictor.embedding_model])
+    assert model == predictor.embedding_model
+    assert [p['model'] for p in predictions] == [predictor.embedding_model]
+    assert predictions[0]['embedding'] is not None
+
+    _, _, _, predictions = client.predict_ensemble(image, model_types=['vit'])
+    assert [p['model'] for p in predictions] == ['vit']
+    assert predictions[0]['embedding'] is None
+    assert client.predict_ensemble(image, model_types=['unknown']) == (None, 0.0, None, [])
+    assert client.stats()['requests'] == 2
+
+
+def test_protocol_frames_round_trip():
+    import socket
+
+    import inference_protocol as protocol
+
+    left, right = socket.socketpair()
+    with left, right:
+        protocol.send_request(left, protocol.OP_PREDICT, 224, 'psm_abc', 0b101)
+        assert protocol.read_request(right) == (protocol.OP_PREDICT, 224, 'psm_abc', 0b101)
+
+        payload = protocol.pack_predictions([(0, 76, 0.5), (2, 3, 0.25)], np.arange(4, dtype=np.float32))
+        protocol.send_response(right, protocol.OP_PREDICT, payload)
+        op, received = protocol.read_response(left)
+        predictions, embedding = protocol.unpack_predictions(received)
+        assert op == protocol.OP_PREDICT
+        assert predictions == [(0, 76, 0.5), (2, 3, 0.25)]
+        np.testing.assert_array_equal(embedding, [0, 1, 2, 3])
+        assert protocol.unpack_predictions(protocol.pack_predictions([], None)) == ([], None)
+
+        protocol.send_response(right, protocol.OP_PREDICT, b'model failed', protocol.STATUS_ERROR)
+        with pytest.raises(RuntimeError, match='model failed'):
+            protocol.read_response(left)
+        right.sendall(b'XXXX' + bytes(protocol.REQUEST_HEADER.size - 4))
+        with pytest.raises(protocol.ProtocolError):
+            protocol.read_request(left)
@@ -0,0 +1,136 @@
+import io
+from contextlib import ExitStack
+
+import pytest
+from PIL import Image
+
+import load_shedder
+from load_shedder import (
+    TIER_FULL, TIER_LOCAL_ONLY, TIER_SHED, TIER_SINGLE_BACKBONE, LoadShedder, ServiceOverloaded,
+    queue_thresholds_for
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(load_shedder.time, 'monotonic', clock)
+    return clock
+
+
+def test_queue_depth_escalates_and_recovers_one_tier_at_a_time(clock):
+    shedder = LoadShedder(queue_thresholds=(2, 3, 4), p95_thresholds_ms=(1e9, 1e9, 1e9),
+                          recovery_ratio=0.5, min_dwell_s=10, min_samples=1000)
+    with ExitStack() as outer:
+        assert outer.enter_context(shedder.admit()) == TIER_FULL
+        with ExitStack() as inner:
+            assert inner.enter_context(shedder.admit()) == TIER_SINGLE_BACKBONE
+            assert inner.enter_context(shedder.admit()) == TIER_LOCAL_ONLY
+            with pytest.raises(ServiceOverloaded) as shed:
+                inner.enter_context(shedder.admit())
+            assert shed.value.tier == TIER_SHED
+            assert shedder.stats()['inFlight'] == 3
+
+        # Load is gone but the dwell time keeps the tier
+        assert shedder.tier == TIER_SHED
+        clock.now += 10
+        assert shedder.tier == TIER_LOCAL_ONLY
+        clock.now += 5
+        assert shedder.tier == TIER_LOCAL_ONLY
+        clock.now += 5
+        assert shedder.tier == TIER_SINGLE_BACKBONE
+        # One request in flight is below the threshold but not below recovery_ratio x it
+        clock.now += 10
+        assert shedder.tier == TIER_SINGLE_BACKBONE
+
+    clock.now += 10
+    assert shedder.tier == TIER_FULL
+    stats = shedder.stats()
+    assert stats['transitions'] == 6
+    assert stats['served'] == {'full': 1, 'single_backbone': 1, 'local_only': 1, 'shed': 1}
+
+
+def test_p95_latency_escalates_until_the_window_expires(clock):
+    shedder = LoadShedder(queue_thresholds=(100, 200, 300), p95_thresholds_ms=(100, 200, 300),
+                          recovery_ratio=0.5, min_dwell_s=1, window_s=60, min_samples=5)
+    for _ in range(5):
+        with shedder.admit():
+            clock.now += 0.25
+    assert shedder.stats()['p95Ms'] == pytest.approx(250)
+    assert shedder.tier == TIER_LOCAL_ONLY
+
+    clock.now += 61
+    assert shedder.tier == TIER_SINGLE_BACKBONE
+    clock.now += 1
+    assert shedder.tier == TIER_FULL
+
+
+def test_disabled_shedder_always_serves_full(clock):
+    shedder = LoadShedder(queue_thresholds=(1, 1, 1), enabled=False)
+    with shedder.admit() as tier, shedder.admit() as second:
+        assert tier == second == TIER_FULL
+
+
+def jpeg_upload():
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 32), (200, 120, 40)).save(buffer, 'JPEG')
+    buffer.seek(0)
+    return buffer
+
+
+class OverloadedAnalyzer:
+    embedding_index = None
+    local_predictor = None
+
+    def analyze_food_image(self, image, tier, full_image=None):
+        raise ServiceOverloaded('Server is overloaded and the image could not be analyzed locally',
+                                tier=TIER_LOCAL_ONLY)
+
+
+@pytest.mark.parametrize('queue, expected', [((1, 1, 1), 'shed'), ((100, 200, 300), 'local_only')])
+def test_503_reports_the_tier_that_handled_the_request(tmp_path, queue, expected):
+    import app as app_module
+
+    flask_app = app_module.create_app({'UPLOAD_FOLDER': str(tmp_path / 'uploads'), 'LOAD_SHED_QUEUE': queue})
+    flask_app.extensions['services']._food_analyzer = OverloadedAnalyzer()
+    response = flask_app.test_client().post('/api/analyze', data={
+        'image': (jpeg_upload(), 'meal.jpg'), 'height': '180', 'weight': '80'
+    })
+    assert response.status_code == 503
+    assert response.get_json()['serviceTier'] == expected
+    assert response.headers['X-Service-Tier'] == expected
+    assert response.headers['Retry-After'] == '5'
+
+
+@pytest.mark.parametrize('threads, expected', [(1, (1, 1, 1)), (2, (1, 1, 2)), (8, (4, 6, 8)), (16, (8, 12, 16))])
+def test_default_queue_thresholds_follow_the_thread_count(threads, expected):
+    assert queue_thresholds_for(threads) == expected
+
+
+def test_every_queue_tier_is_reachable_with_the_configured_threads(tmp_path, clock):
+    import app as app_module
+
+    flask_app = app_module.create_app({'UPLOAD_FOLDER': str(tmp_path / 'uploads'), 'WEB_THREADS': 4})
+    shedder = flask_app.extensions['services'].load_shedder
+    assert shedder.queue_thresholds == (2, 3, 4)
+
+    # No more requests than threads can be in flight, and that's enough to reach the shed tier
+    tiers = []
+    with ExitStack() as stack:
+        for _ in range(3):
+            tiers.append(stack.enter_context(shedder.admit()))
+        with pytest.raises(ServiceOverloaded):
+            stack.enter_context(shedder.admit())
+    assert tiers == [TIER_FULL, TIER_SINGLE_BACKBONE, TIER_LOCAL_ONLY]
+
+    overridden = app_module.create_app({'UPLOAD_FOLDER': str(tmp_path / 'uploads'), 'WEB_THREADS': 4,
+                                        'LOAD_SHED_QUEUE': (10, 20, 30)})
+    assert overridden.extensions['services'].load_shedder.queue_thresholds == (10, 20, 30)
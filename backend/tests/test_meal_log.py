@@ -0,0 +1,61 @@
+from datetime import date
+
+import pytest
+
+from meal_log import MealLog, parse_day, week_start
+
+
+def food(calories, sugar='10g', sodium='400mg'):
+    return {'foodName': 'Meal', 'calories': calories, 'modelUsed': 'Gemini API',
+            'nutritionalBreakdown': {'protein': '20g', 'sugar': sugar, 'sodium': sodium}}
+
+
+def test_week_starts_on_monday():
+    assert week_start(date(2026, 10, 18)) == date(2026, 10, 12)
+    assert week_start(date(2026, 10, 19)) == date(2026, 10, 19)
+    assert parse_day(' 2026-10-19 ') == date(2026, 10, 19)
+    with pytest.raises(ValueError):
+        parse_day('19/10/2026')
+
+
+def test_daily_totals_accumulate_per_profile_and_day(tmp_path):
+    log = MealLog(str(tmp_path / 'meals.db'))
+    _, totals = log.log('alice', food(500), 25.0, '2026-10-19')
+    assert (totals.meals, totals.nutrition.calories) == (1, 500)
+    _, totals = log.log('alice', food(300, sugar='5g'), 15.0, '2026-10-19')
+    assert totals.meals == 2
+    assert totals.nutrition.calories == 800
+    assert totals.nutrition.sugar == 15
+    assert totals.nutrition.sodium == 800
+    assert totals.calorie_percentage == 40
+
+    log.log('bob', food(900), 45.0, '2026-10-19')
+    log.log('alice', food(100), 5.0, '2026-10-20')
+    assert log.day_totals('alice', '2026-10-19').nutrition.calories == 800
+    assert log.day_totals('bob', '2026-10-19').nutrition.calories == 900
+    assert log.day_totals('alice', '2026-10-21').meals == 0
+    log.close()
+
+    reopened = MealLog(str(tmp_path / 'meals.db'))
+    assert reopened.day_totals('alice', '2026-10-19').to_dict()['totals']['calories'] == 800
+    reopened.close()
+
+
+def test_weekly_totals_count_days_with_meals():
+    log = MealLog()
+    log.log('alice', food(600), 30.0, '2026-10-19')  # Monday
+    log.log('alice', food(400), 20.0, '2026-10-19')
+    log.log('alice', food(500), 25.0, '2026-10-22')
+    log.log('alice', food(700), 35.0, '2026-10-26')  # next Monday
+
+    week = log.week_totals('alice', '2026-10-25')
+    assert (week.meals, week.days) == (3, 2)
+    assert week.nutrition.calories == 1500
+
+    average = week.per_day()
+    assert average.nutrition.calories == 750
+    assert average.to_dict()['meals'] == 1.5
+    assert average.calorie_percentage == 37.5
+
+    assert log.week_totals('alice', '2026-10-26').meals == 1
+    assert log.week_totals('bob', '2026-10-19').to_dict()['totals']['calories'] == 0
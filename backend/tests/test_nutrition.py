@@ -0,0 +1,45 @@
+import pytest
+
+from nutrition import FoodAnalysis, NutritionRecord, parse_quantity
+
+
+@pytest.mark.parametrize('value, unit, expected', [
+    ('12g', 'g', 12.0),
+    ('2.5 g', 'g', 2.5),
+    ('.5g', 'g', 0.5),
+    ('0.5g', 'g', 0.5),
+    ('850mg', 'mg', 850.0),
+    ('850mg', 'g', 0.85),
+    ('1.2 g', 'mg', 1200.0),
+    ('1,200 mg', 'mg', 1200.0),
+    ('1,200mg', 'mg', 1200.0),
+    ('1,200,000 mcg', 'mg', 1200.0),
+    ('2,5g', 'g', 2.5),
+    ('0,75 g', 'mg', 750.0),
+    ('1,5-2,0g', 'g', 1.5),
+    ('10-12g', 'g', 10.0),
+    ('5 to 7 g', 'g', 5.0),
+    ('300mcg', 'mg', 0.3),
+    ('0.1kg', 'g', 100.0),
+    ('about 15g', 'g', 15.0),
+    (1200, 'mg', 1200.0),
+    (2.5, 'g', 2.5),
+    ('15', 'g', 15.0),
+    (None, 'g', 0.0),
+    (True, 'g', 0.0),
+    ('trace', 'g', 0.0),
+])
+def test_parse_quantity(value, unit, expected):
+    assert parse_quantity(value, unit=unit) == pytest.approx(expected)
+
+
+def test_food_analysis_parses_nutrition_once():
+    analysis = FoodAnalysis({
+        'calories': '450 kcal',
+        'nutritionalBreakdown': {'protein': '20g', 'fats': '.5g', 'sodium': '1.1g', 'sugar': '3 g'},
+    })
+    assert isinstance(analysis.nutrition, NutritionRecord)
+    assert analysis.nutrition.calories == 450.0
+    assert analysis.nutrition.fats == 0.5
+    assert analysis.nutrition.sodium == pytest.approx(1100.0)
+    assert analysis.nutrition.fiber == 0.0
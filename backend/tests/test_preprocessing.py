@@ -0,0 +1,33 @@
+import warnings
+
+import numpy as np
+import torch
+from PIL import Image
+
+from preprocessing import IMAGENET_MEAN, IMAGENET_STD, ImagePreprocessor
+
+
+def test_tensors_are_normalized_without_warnings():
+    preprocessor = ImagePreprocessor()
+    image = Image.fromarray(np.arange(48 * 32 * 3, dtype=np.uint8).reshape(32, 48, 3))
+    mean = torch.tensor(IMAGENET_MEAN).view(3, 1, 1)
+    std = torch.tensor(IMAGENET_STD).view(3, 1, 1)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        with preprocessor.tensors(image, [16, 24, 16]) as tensors:
+            assert sorted(tensors) == [16, 24]
+            for size, tensor in tensors.items():
+                pixels = torch.from_numpy(np.array(image.resize((size, size), Image.BILINEAR, reducing_gap=2.0)))
+                expected = (pixels.permute(2, 0, 1).float() / 255 - mean) / std
+                assert tensor.shape == (1, 3, size, size)
+                assert torch.allclose(tensor[0], expected, atol=1e-4)
+
+
+def test_buffers_are_reused():
+    preprocessor = ImagePreprocessor()
+    image = Image.new('RGB', (40, 40))
+    with preprocessor.tensors(image, [32]) as tensors:
+        first = tensors[32]
+    with preprocessor.tensors(image, [32]) as tensors:
+        assert tensors[32] is first
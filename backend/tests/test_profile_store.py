@@ -0,0 +1,102 @@
+import pytest
+
+from health_assessor import HealthAssessor
+from profile_store import ProfileStore
+
+
+@pytest.fixture
+def client(tmp_path):
+    import app as app_module
+
+    flask_app = app_module.create_app({'UPLOAD_FOLDER': str(tmp_path / 'uploads'), 'WARM_UP': False})
+    return flask_app.test_client()
+
+
+def test_register_and_update(tmp_path):
+    store = ProfileStore(HealthAssessor(), db_path=str(tmp_path / 'profiles.db'))
+    profile = store.register(180, 80, ['Type 2 Diabetes'])
+    assert store.get(profile.profile_id) is profile
+
+    updated = store.register(180, 75, ['hypertension'], profile_id=profile.profile_id)
+    assert updated.profile_id == profile.profile_id
+    assert store.get(profile.profile_id).weight == 75
+    store.close()
+
+
+def test_register_rejects_unknown_profile_id():
+    store = ProfileStore(HealthAssessor())
+    with pytest.raises(KeyError):
+        store.register(180, 80, [], profile_id='made-up')
+    assert store.get('made-up') is None
+
+
+def test_evicted_profiles_reload_from_sqlite(tmp_path):
+    store = ProfileStore(HealthAssessor(), max_size=2, db_path=str(tmp_path / 'profiles.db'))
+    first = store.register(170, 70, ['heart disease'])
+    store.register(160, 60, [])
+    store.register(150, 50, [])
+    assert len(store) == 2
+
+    reloaded = store.get(first.profile_id)
+    assert reloaded is not first
+    assert (reloaded.height, reloaded.weight, reloaded.diseases) == (170, 70, ['heart disease'])
+    # An evicted profile can still be updated by id
+    assert store.register(170, 68, [], profile_id=first.profile_id).weight == 68
+    store.close()
+
+
+@pytest.mark.parametrize('body', [
+    {'height': 180, 'weight': 80, 'diseases': [1, 2]},
+    {'height': 180, 'weight': 80, 'diseases': {'diabetes': True}},
+    {'height': [180], 'weight': 80},
+    {'height': 'tall', 'weight': 80},
+])
+def test_profile_endpoint_rejects_bad_fields(client, body):
+    response = client.post('/api/profile', json=body)
+    assert response.status_code == 400
+
+
+def test_profile_endpoint_unknown_id_is_404(client):
+    response = client.post('/api/profile', json={'height': 180, 'weight': 80, 'profileId': 'made-up'})
+    assert response.status_code == 404
+
+    created = client.post('/api/profile', json={'height': 180, 'weight': 80, 'diseases': 'diabetes, '})
+    assert created.status_code == 200
+    profile = created.get_json()['profile']
+    response = client.post('/api/profile', json={'height': 180, 'weight': 70, 'profileId': profile['profileId']})
+    assert response.status_code == 200
+
+
+def test_updates_from_another_worker_are_seen(tmp_path):
+    db_path = str(tmp_path / 'profiles.db')
+    first, second = ProfileStore(HealthAssessor(), db_path=db_path), ProfileStore(HealthAssessor(), db_path=db_path)
+    profile = first.register(180, 80, ['diabetes'])
+    cached = second.get(profile.profile_id)
+    assert second.get(profile.profile_id) is cached
+
+    first.register(180, 100, ['heart disease'], profile_id=profile.profile_id)
+    updated = second.get(profile.profile_id)
+    assert (updated.weight, updated.diseases) == (100, ['heart disease'])
+    assert updated.version == 2
+    assert updated.daily_calories != cached.daily_calories
+    assert updated.rules is not cached.rules
+    first.close()
+    second.close()
+
+
+def test_adds_version_column_to_existing_databases(tmp_path):
+    import sqlite3
+
+    db_path = str(tmp_path / 'profiles.db')
+    db = sqlite3.connect(db_path)
+    db.execute("CREATE TABLE profiles (profile_id TEXT PRIMARY KEY, height REAL NOT NULL, weight REAL NOT NULL, "
+               "diseases TEXT NOT NULL, bmi REAL, bmi_category TEXT, bmr REAL, daily_calories REAL, "
+               "updated_at REAL NOT NULL)")
+    db.execute("INSERT INTO profiles VALUES ('old', 170, 70, '[]', 24.2, 'Normal weight', 1600, 2200, 0)")
+    db.commit()
+    db.close()
+
+    store = ProfileStore(HealthAssessor(), db_path=db_path)
+    assert store.get('old').version == 1
+    assert store.register(170, 72, [], profile_id='old').version == 2
+    store.close()
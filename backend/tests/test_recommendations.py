@@ -0,0 +1,128 @@
+import random
+
+import pytest
+
+from health_assessor import HealthAssessor
+
+
+def baseline_recommendations(bmi_category, diseases, suitability, food_data, calorie_percentage):
+    """_generate_recommendations as it was written before the decision table"""
+    recommendations = []
+    is_junk = suitability.get('isJunkFood', False)
+    food_name = food_data.get('foodName', '')
+    calories = food_data.get('calories', 0)
+
+    if bmi_category in ['Overweight', 'Obese'] and is_junk:
+        recommendations.append(f"🚫 AVOID THIS FOOD: {food_name} is junk food and will worsen your weight condition")
+        recommendations.append("💡 Choose grilled, steamed, or baked options with vegetables instead")
+        recommendations.append("🏃 Increase physical activity to burn excess calories")
+    if bmi_category == 'Underweight':
+        recommendations.append("✅ Increase caloric intake with nutrient-dense foods like nuts, avocados, and lean proteins")
+        if not is_junk:
+            recommendations.append("✅ This food can be part of your weight gain diet")
+    elif bmi_category == 'Overweight':
+        if not is_junk and calories < 500:
+            recommendations.append("✅ Good choice! Focus on similar low-calorie, nutritious meals")
+        recommendations.append("🎯 Target: Reduce 500 calories per day for healthy weight loss")
+        if calorie_percentage > 35:
+            recommendations.append("⚠️ This meal is a large portion of your daily calories - reduce serving size")
+    elif bmi_category == 'Obese':
+        if is_junk:
+            recommendations.append("🚨 CRITICAL: This food will significantly hinder your weight loss goals")
+        recommendations.append("💪 Urgent: Adopt a calorie deficit diet (500-1000 cal/day reduction)")
+        recommendations.append("🥗 Prioritize: Vegetables, lean proteins, whole grains, and fruits")
+        if calories > 400:
+            recommendations.append(f"❌ This {calories} cal meal is too high - aim for 300-400 cal per meal")
+    if calorie_percentage > 50:
+        recommendations.append("⚠️ HIGH CALORIE ALERT: This is >50% of your daily needs - skip or drastically reduce portion")
+    elif calorie_percentage > 40:
+        recommendations.append("⚠️ This meal uses 40%+ of daily calories - balance with light meals")
+    for disease in diseases or []:
+        if 'diabetes' in disease.lower() and is_junk:
+            recommendations.append("🚨 DIABETIC ALERT: Junk food causes dangerous blood sugar spikes")
+        if 'heart' in disease.lower() and is_junk:
+            recommendations.append("❤️ HEART RISK: High-fat processed foods increase cardiovascular risk")
+    if suitability['warnings']:
+        recommendations.append("⚠️ HEALTH WARNINGS: Review all warnings above carefully before consuming")
+    health_score = food_data.get('foodQualityCycle', {}).get('healthScore', 5)
+    if health_score < 4:
+        recommendations.append("❌ POOR FOOD QUALITY: Choose fresher, less processed alternatives")
+    elif health_score < 6:
+        recommendations.append("⚠️ Consider healthier preparation methods (grilled, steamed, baked)")
+    if not is_junk and suitability['suitable'] and health_score >= 7:
+        recommendations.append("✅ EXCELLENT CHOICE! This food aligns well with your health goals")
+        if bmi_category == 'Normal weight':
+            recommendations.append("👍 Keep making healthy choices like this to maintain your weight")
+    if not recommendations:
+        recommendations.append("💡 Maintain a balanced diet with variety in nutrients")
+    return recommendations[:7]
+
+
+CONDITIONS = ['heart disease', 'diabetes', 'Type 2 Diabetes', 'diabetic heart disease', 'hypertension', 'obesity']
+BMI_CATEGORIES = ['Underweight', 'Normal weight', 'Overweight', 'Obese']
+
+
+def test_decision_table_matches_baseline():
+    rng = random.Random(29)
+    assessor = HealthAssessor()
+    for _ in range(5000):
+        diseases = rng.sample(CONDITIONS, rng.randint(0, 3))
+        suitability = {'isJunkFood': rng.random() < 0.5, 'warnings': ['w'] * rng.randint(0, 1),
+                       'suitable': rng.random() < 0.5}
+        food_data = {'foodName': 'Pizza', 'calories': rng.choice([250, 400, 450, 500, 800]),
+                     'foodQualityCycle': {'healthScore': rng.choice([2, 4, 5, 6, 7, 9])}}
+        bmi_category = rng.choice(BMI_CATEGORIES)
+        calorie_percentage = rng.choice([20, 36, 41, 55])
+
+        expected = baseline_recommendations(bmi_category, diseases, suitability, food_data, calorie_percentage)
+        actual = assessor._generate_recommendations(bmi_category, diseases, suitability, food_data,
+                                                    calorie_percentage)
+        assert actual == expected, (bmi_category, diseases, suitability, food_data, calorie_percentage)
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class CountingModel:
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt, generation_config=None):
+        self.prompts.append(prompt)
+        return FakeResponse(f'["tip {len(self.prompts)}"]')
+
+
+@pytest.fixture
+def analyzer():
+    from food_analyzer import FoodAnalyzer
+
+    analyzer = FoodAnalyzer('test-key', use_local_models=False, embedding_index_size=0)
+    analyzer.model = CountingModel()
+    return analyzer
+
+
+def test_recommendation_cache_is_keyed_on_the_whole_analysis(analyzer):
+    food = {'foodName': 'Pizza', 'calories': 300, 'ingredients': ['cheese']}
+    first = analyzer.get_food_recommendations(food, ['Diabetes'])
+    assert analyzer.get_food_recommendations(dict(food), [' diabetes ']) == first
+    assert len(analyzer.model.prompts) == 1
+
+    # Same name, different analysis: the prompt differs, so the cache must not answer
+    assert analyzer.get_food_recommendations(dict(food, calories=900), ['Diabetes']) != first
+    assert analyzer.get_food_recommendations(dict(food, ingredients=['ham']), ['Diabetes']) != first
+    assert len(analyzer.model.prompts) == 3
+
+
+def test_repeated_conditions_do_not_grow_the_template_cache():
+    from recommendations import MAX_RECOMMENDATIONS, disease_alerts, recommendation_templates
+
+    recommendation_templates.cache_clear()
+    assessor = HealthAssessor()
+    suitability = {'isJunkFood': True, 'warnings': [], 'suitable': False}
+    food_data = {'foodName': 'Donut', 'calories': 300, 'foodQualityCycle': {'healthScore': 2}}
+    for count in range(1, 200):
+        assessor._generate_recommendations('Normal weight', ['diabetes'] * count, suitability, food_data, 10)
+    assert len(disease_alerts(('diabetes',) * 50)) == MAX_RECOMMENDATIONS
+    assert recommendation_templates.cache_info().currsize <= MAX_RECOMMENDATIONS
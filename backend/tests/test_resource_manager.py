@@ -0,0 +1,105 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import torch
+
+from resource_manager import InferenceResources, autotune, candidate_splits
+
+
+@pytest.fixture(autouse=True)
+def restore_torch_threads():
+    threads = torch.get_num_threads()
+    yield
+    torch.set_num_threads(threads)
+
+
+class ConcurrencyProbe:
+    """Workload that records how many copies of itself run at once"""
+
+    def __init__(self, hold_s=0.02):
+        self.hold_s = hold_s
+        self.current = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, value):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        time.sleep(self.hold_s)
+        with self.lock:
+            self.current -= 1
+        return value * 2
+
+
+@pytest.mark.parametrize('use_pool', [False, True])
+def test_run_never_exceeds_max_concurrent(use_pool):
+    resources = InferenceResources(intra_op_threads=1, max_concurrent=2, use_pool=use_pool)
+    probe = ConcurrencyProbe()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda i: resources.run(probe, i), range(16)))
+    assert results == [i * 2 for i in range(16)]
+    assert probe.peak == 2
+    assert resources.describe()['active'] == resources.describe()['waiting'] == 0
+
+
+def test_describe_reports_active_and_waiting():
+    resources = InferenceResources(intra_op_threads=1, max_concurrent=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+
+    threads = [threading.Thread(target=resources.run, args=(hold,)) for _ in range(3)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while resources.describe()['waiting'] < 2 and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+    described = resources.describe()
+    assert (described['active'], described['waiting'], described['maxConcurrent']) == (1, 2, 1)
+    assert described['intraOpThreads'] == 1
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert (resources.describe()['active'], resources.describe()['waiting']) == (0, 0)
+
+
+def test_defaults_split_cores_between_threads_and_slots(monkeypatch):
+    import resource_manager
+
+    monkeypatch.setattr(resource_manager, 'available_cores', lambda: 8)
+    resources = InferenceResources(intra_op_threads=2)
+    assert (resources.cores, resources.max_concurrent, resources.inter_op_threads) == (8, 4, 1)
+    assert InferenceResources(intra_op_threads=16).max_concurrent == 1
+
+
+@pytest.mark.parametrize('cores, expected', [
+    (1, [(1, 1)]),
+    (4, [(1, 4), (2, 2), (4, 1)]),
+    (6, [(1, 6), (2, 3), (4, 1), (6, 1)]),
+])
+def test_candidate_splits(cores, expected):
+    assert candidate_splits(cores) == expected
+
+
+def test_autotune_ranks_every_split():
+    results = autotune(lambda: time.sleep(0.001), requests=4, client_threads=2, splits=[(1, 1), (1, 2)])
+    assert len(results) == 3
+    assert {r['mode'] for r in results} == {'oversubscribed', 'split'}
+    assert results == sorted(results, key=lambda r: r['throughput'], reverse=True)
+
+
+def test_shared_resources_can_coexist_with_new_instances():
+    from resource_manager import get_resources
+
+    assert get_resources() is get_resources()
+    InferenceResources(inter_op_threads=2)  # interop threads are only set once per process
+    assert get_resources().run(lambda: 'ok') == 'ok'
@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED_MODULES = ('torch', 'torchvision', 'google.generativeai', 'numpy', 'PIL.Image')
+
+
+def run_fresh(code, tmp_path):
+    """Run `code` in a new interpreter with the backend importable; returns its JSON output"""
+    env = dict(os.environ, WARM_UP='false', PYTHONPATH=BACKEND_DIR)
+    result = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, check=True, timeout=60)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_create_app_does_not_import_heavy_dependencies(tmp_path):
+    output = run_fresh(
+        "import json, sys, app\n"
+        "flask_app = app.create_app()\n"
+        "client = flask_app.test_client()\n"
+        "status = client.get('/api/health').status_code\n"
+        f"print(json.dumps({{'status': status, 'loaded': flask_app.extensions['services'].loaded(),\n"
+        f"                  'imported': [m for m in {DEFERRED_MODULES!r} if m in sys.modules]}}))\n",
+        tmp_path
+    )
+    assert output == {'status': 200, 'loaded': [], 'imported': []}
+
+
+def test_module_level_app_is_built_lazily_once(tmp_path):
+    output = run_fresh(
+        "import json, sys, app\n"
+        "before = app._app is None\n"
+        "first = app.app\n"
+        f"print(json.dumps({{'before': before, 'same': app.app is first, 'built': app._app is first,\n"
+        f"                  'imported': [m for m in {DEFERRED_MODULES!r} if m in sys.modules]}}))\n",
+        tmp_path
+    )
+    assert output == {'before': True, 'same': True, 'built': True, 'imported': []}
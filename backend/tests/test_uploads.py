@@ -0,0 +1,78 @@
+import io
+import mmap
+import random
+
+import pytest
+from flask import Flask, jsonify, request
+from PIL import Image
+
+import uploads
+from uploads import UploadError, make_request_class, open_upload_image
+
+
+def jpeg_bytes(size=(64, 48)):
+    buffer = io.BytesIO()
+    # Noise, so the file doesn't compress below the spool threshold
+    noise = random.Random(30).randbytes(size[0] * size[1] * 3)
+    Image.frombytes('RGB', size, noise).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    mapped = []
+    real_mmap = mmap.mmap
+
+    def recording_mmap(*args, **kwargs):
+        mapped.append(args[0])
+        return real_mmap(*args, **kwargs)
+
+    monkeypatch.setattr(uploads.mmap, 'mmap', recording_mmap)
+    app = Flask(__name__)
+    app.request_class = make_request_class(1024, str(tmp_path))
+
+    @app.route('/upload', methods=['POST'])
+    def upload():
+        image = open_upload_image(request.files['image'], max_pixels=10_000)
+        return jsonify({'size': list(image.size), 'stream': type(request.files['image'].stream).__name__})
+
+    client = app.test_client()
+    client.mapped = mapped
+    return client
+
+
+def test_small_uploads_stay_in_memory(client):
+    response = client.post('/upload', data={'image': (io.BytesIO(jpeg_bytes((8, 8))), 'a.jpg')})
+    assert response.get_json() == {'size': [8, 8], 'stream': 'BytesIO'}
+    assert client.mapped == []
+
+
+def test_large_uploads_are_memory_mapped(client):
+    data = jpeg_bytes()
+    assert len(data) > 1024
+    response = client.post('/upload', data={'image': (io.BytesIO(data), 'a.jpg')})
+    assert response.get_json()['size'] == [64, 48]
+    assert len(client.mapped) == 1
+
+
+def test_rejects_non_images_and_oversized_images():
+    class Upload:
+        def __init__(self, data):
+            self.stream = io.BytesIO(data)
+
+    with pytest.raises(UploadError) as error:
+        open_upload_image(Upload(b'%PDF-1.4 not an image'), max_pixels=10_000)
+    assert error.value.status_code == 415
+    with pytest.raises(UploadError) as error:
+        open_upload_image(Upload(jpeg_bytes((200, 100))), max_pixels=10_000)
+    assert error.value.status_code == 413
+
+
+def test_draft_decode_only_reduces_when_asked():
+    class Upload:
+        def __init__(self, data):
+            self.stream = io.BytesIO(data)
+
+    upload = Upload(jpeg_bytes((256, 128)))
+    assert open_upload_image(upload, max_pixels=100_000, draft_size=32).size == (64, 32)
+    assert open_upload_image(upload, max_pixels=100_000).size == (256, 128)
@@ -0,0 +1,96 @@
+import io
+import mmap
+import tempfile
+from flask import Request
+
+# Magic numbers of the image formats we accept
+_IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'BM', 'bmp'),
+)
+SNIFF_BYTES = 16
+
+
+class UploadError(ValueError):
+    """Rejected upload; carries the HTTP status to answer with"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def sniff_image_type(header):
+    """Return the image format from the first bytes of a file, or None"""
+    for signature, image_type in _IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_type
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def make_request_class(spool_threshold, upload_dir=None):
+    """
+    Flask request class whose multipart file parts are kept in memory up to
+    `spool_threshold` bytes and written to a temp file in `upload_dir` above
+    that, instead of growing worker memory. Chunked requests of unknown length
+    go to a SpooledTemporaryFile that moves to disk once it passes the threshold.
+    """
+    class SpoolingRequest(Request):
+        def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+            if total_content_length is None:
+                return tempfile.SpooledTemporaryFile(max_size=spool_threshold, dir=upload_dir)
+            if total_content_length > spool_threshold:
+                return tempfile.TemporaryFile(dir=upload_dir)
+            return io.BytesIO()
+
+    return SpoolingRequest
+
+
+def open_upload_image(file_storage, max_pixels, draft_size=None):
+    """
+    Validate and decode an uploaded image without copying it into a new buffer.
+    The format is checked from the magic bytes and the dimensions from the image
+    header before any pixel data is decoded. Spooled-to-disk uploads are decoded
+    from a memory map of the temp file. With `draft_size`, JPEGs are decoded
+    directly at the smallest DCT scale that is still at least that size.
+    """
+    from PIL import Image
+
+    stream = file_storage.stream
+    stream.seek(0)
+    header = stream.read(SNIFF_BYTES)
+    stream.seek(0)
+    if not sniff_image_type(header):
+        raise UploadError('Unsupported file type - upload a JPEG, PNG, WEBP, GIF or BMP image', 415)
+
+    mapped = None
+    source = stream
+    # SpooledTemporaryFile.fileno() would force an in-memory upload to disk
+    if not isinstance(stream, tempfile.SpooledTemporaryFile):
+        try:
+            mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+            source = mapped
+        except (AttributeError, io.UnsupportedOperation, OSError, ValueError):
+            mapped = None
+
+    try:
+        # Image.open only parses the header; pixels are decoded by load()
+        image = Image.open(source)
+        width, height = image.size
+        if width * height > max_pixels:
+            raise UploadError(f'Image is too large ({width}x{height}) - maximum is {max_pixels} pixels', 413)
+        if draft_size and image.format == 'JPEG':
+            image.draft('RGB', (draft_size, draft_size))
+        image.load()
+        return image
+    except UploadError:
+        raise
+    except (Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise UploadError(f'Invalid image: {e}', 400)
+    finally:
+        if mapped is not None:
+            mapped.close()